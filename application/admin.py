@@ -0,0 +1,44 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+
+from application.dashboard import get_dashboard_widgets
+
+
+class CachedAdminSite(admin.AdminSite):
+    """
+    Admin site that caches the app list (sidebar menu of jazzmin, admin index
+    and app index) by the permission set of the user, instead of rebuilding
+    it and checking every model permission on each admin page. It also puts
+    the cached dashboard widgets (application.dashboard) in the index context.
+    """
+
+    def _registry_key(self):
+        # the registered models only change with a new deploy
+        key = getattr(self, '_registry_fingerprint', None)
+        if key is None:
+            labels = sorted(model._meta.label_lower for model in self._registry)
+            key = self._registry_fingerprint = hashlib.md5("|".join(labels).encode()).hexdigest()[:12]
+        return key
+
+    def _permissions_key(self, user):
+        if not user.is_active:
+            return 'inactive'
+        if user.is_superuser:
+            return 'superuser'
+        perms = "|".join(sorted(user.get_all_permissions()))
+        return hashlib.md5(("%s:%s" % (user.is_staff, perms)).encode()).hexdigest()
+
+    def _build_app_dict(self, request, label=None):
+        key = 'admin:app-dict:%s:%s:%s' % (self._registry_key(), label or '', self._permissions_key(request.user))
+        app_dict = cache.get(key)
+        if app_dict is None:
+            app_dict = super()._build_app_dict(request, label)
+            cache.set(key, app_dict, settings.ADMIN_MENU_CACHE_TIMEOUT)
+        return app_dict
+
+    def index(self, request, extra_context=None):
+        extra_context = {'dashboard_widgets': get_dashboard_widgets(), **(extra_context or {})}
+        return super().index(request, extra_context)
@@ -0,0 +1,299 @@
+from collections import OrderedDict
+import math
+import pickle
+import random
+import threading
+from time import monotonic, sleep, time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.memcached import PyMemcacheCache
+
+
+class _Entry:
+    """ Value stored by get_or_set, with what the early expiration needs. """
+    __slots__ = ('value', 'expires_at', 'delta')
+
+    def __init__(self, value, expires_at, delta):
+        self.value = value
+        self.expires_at = expires_at
+        self.delta = delta
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend with a bounded in-process LRU in front of memcached.
+
+    OPTIONS:
+        LOCAL_MAX_ENTRIES   entries kept in the process LRU (default 5000)
+        LOCAL_TIMEOUT       max seconds an entry lives in the LRU in front of
+                            memcached (default 5), which bounds how long a
+                            process may see a value another process already
+                            changed or deleted. Without memcached, the
+                            entries keep the timeout they were set with.
+        PREFIX_TIMEOUTS     {key prefix: timeout} used when set() is called
+                            without an explicit timeout
+        EARLY_EXPIRATION    beta of the probabilistic early expiration of
+                            get_or_set (default 1.0, 0 disables it)
+        LOCK_TIMEOUT        seconds a get_or_set recompute lock lasts (default 10)
+        MEMCACHED_OPTIONS   options of the pymemcache client
+
+    An empty LOCATION (or memcached down) leaves only the local tier working,
+    so every environment runs the same caching code.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = dict(params.get('OPTIONS') or {})
+
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 5000))
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self._prefix_timeouts = sorted((options.get('PREFIX_TIMEOUTS') or {}).items(), key=lambda i: len(i[0]), reverse=True)
+        self._beta = float(options.get('EARLY_EXPIRATION', 1.0))
+        self._lock_timeout = int(options.get('LOCK_TIMEOUT', 10))
+        self._stats = {'local_hits': 0, 'remote_hits': 0, 'misses': 0, 'recomputes': 0}
+        self._stats_lock = threading.Lock()
+
+        self._remote = None
+        if location:
+            self._remote = PyMemcacheCache(location, {
+                'TIMEOUT': params.get('TIMEOUT', 300),
+                'KEY_PREFIX': params.get('KEY_PREFIX', ''),
+                'VERSION': params.get('VERSION', 1),
+                'KEY_FUNCTION': params.get('KEY_FUNCTION'),
+                'OPTIONS': {
+                    # a missing memcached is a cache miss, not an error
+                    'ignore_exc': True,
+                    'no_delay': True,
+                    'connect_timeout': 0.2,
+                    'timeout': 0.5,
+                    'retry_attempts': 1,
+                    'dead_timeout': 30,
+                    **(options.get('MEMCACHED_OPTIONS') or {}),
+                },
+            })
+
+    # local tier
+
+    def _local_ttl(self, timeout):
+        # in front of memcached the local copy only lives LOCAL_TIMEOUT
+        # seconds; alone, the local tier keeps the timeout of the caller
+        if self._remote is None:
+            return math.inf if timeout is None else timeout
+        return self._local_timeout if timeout is None else min(timeout, self._local_timeout)
+
+    def _local_get_locked(self, key):
+        # the caller holds _local_lock
+        item = self._local.get(key)
+        if item is None:
+            return None
+        pickled, expires_at = item
+        if expires_at <= monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return pickled
+
+    def _local_set_locked(self, key, pickled, expires_at):
+        # the caller holds _local_lock
+        self._local[key] = (pickled, expires_at)
+        self._local.move_to_end(key)
+        while len(self._local) > self._local_max_entries:
+            self._local.popitem(last=False)
+
+    def _local_get(self, key):
+        with self._local_lock:
+            pickled = self._local_get_locked(key)
+        return None if pickled is None else pickle.loads(pickled)
+
+    def _local_set(self, key, value, timeout):
+        ttl = self._local_ttl(timeout)
+        if ttl <= 0:
+            self._local_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._local_lock:
+            self._local_set_locked(key, pickled, monotonic() + ttl)
+
+    def _local_delete(self, key):
+        with self._local_lock:
+            return self._local.pop(key, None) is not None
+
+    # helpers
+
+    def _timeout(self, key, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            for prefix, prefix_timeout in self._prefix_timeouts:
+                if key.startswith(prefix):
+                    return prefix_timeout
+            return self.default_timeout
+        return timeout
+
+    def _seconds(self, timeout):
+        # django timeout: None never expires, <= 0 expires at once
+        return None if timeout is None else max(timeout, 0)
+
+    def _unwrap(self, value):
+        return value.value if isinstance(value, _Entry) else value
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['local_hits'] + stats['remote_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['local_hits'] + stats['remote_hits']) / lookups if lookups else 0.0
+        stats['local_entries'] = len(self._local)
+        return stats
+
+    # cache api
+
+    def _get_raw(self, key, version):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self._local_get(local_key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        if self._remote is not None:
+            value = self._remote.get(key, version=version)
+            if value is not None:
+                self._count('remote_hits')
+                timeout = None
+                if isinstance(value, _Entry) and value.expires_at is not None:
+                    timeout = value.expires_at - time()
+                self._local_set(local_key, value, timeout)
+                return value
+
+        self._count('misses')
+        return None
+
+    def get(self, key, default=None, version=None):
+        value = self._get_raw(key, version)
+        return default if value is None else self._unwrap(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._seconds(self._timeout(key, timeout))
+        self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+        if self._remote is not None:
+            self._remote.set(key, value, timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._seconds(self._timeout(key, timeout))
+        local_key = self.make_and_validate_key(key, version=version)
+        if self._remote is not None:
+            added = self._remote.add(key, value, timeout, version=version)
+            if added:
+                self._local_set(local_key, value, timeout)
+            return added
+
+        ttl = self._local_ttl(timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        # the check and the set under the same lock, as memcached does
+        with self._local_lock:
+            if self._local_get_locked(local_key) is not None:
+                return False
+            if ttl > 0:
+                self._local_set_locked(local_key, pickled, monotonic() + ttl)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._seconds(self._timeout(key, timeout))
+        local_key = self.make_and_validate_key(key, version=version)
+        if self._remote is not None:
+            self._local_delete(local_key)
+            return self._remote.touch(key, timeout, version=version)
+
+        value = self._local_get(local_key)
+        if value is None:
+            return False
+        self._local_set(local_key, value, timeout)
+        return True
+
+    def delete(self, key, version=None):
+        deleted = self._local_delete(self.make_and_validate_key(key, version=version))
+        if self._remote is not None:
+            deleted = self._remote.delete(key, version=version) or deleted
+        return deleted
+
+    def has_key(self, key, version=None):
+        return self._get_raw(key, version) is not None
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        if self._remote is not None:
+            # atomic in memcached, the local copy is just dropped
+            self._local_delete(local_key)
+            return self._remote.incr(key, delta, version=version)
+
+        with self._local_lock:
+            pickled = self._local_get_locked(local_key)
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(pickled) + delta
+            self._local_set_locked(local_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._local[local_key][1])
+        return value
+
+    def clear(self):
+        with self._local_lock:
+            self._local.clear()
+        if self._remote is not None:
+            self._remote.clear()
+
+    def close(self, **kwargs):
+        if self._remote is not None:
+            self._remote.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Stampede protected get_or_set. The value is recomputed a little before
+        it expires, with a probability that grows as the expiration gets
+        closer (probabilistic early expiration, scaled by the time the last
+        computation took), and only by the process that gets the recompute
+        lock; the others keep returning the current value.
+        """
+        timeout = self._seconds(self._timeout(key, timeout))
+        entry = self._get_raw(key, version)
+        now = time()
+
+        if isinstance(entry, _Entry):
+            expired_early = (
+                self._beta > 0 and entry.expires_at is not None and
+                now - entry.delta * self._beta * math.log(1.0 - random.random()) >= entry.expires_at)
+            if not expired_early:
+                return entry.value
+        elif entry is not None:
+            return entry
+
+        lock_key = '%s:lock' % key
+        owns_lock = self.add(lock_key, 1, self._lock_timeout, version=version)
+        if not owns_lock:
+            if entry is not None:
+                return self._unwrap(entry)
+
+            # another process is computing the value, wait for it a little
+            deadline = monotonic() + self._lock_timeout
+            while monotonic() < deadline:
+                sleep(0.05)
+                value = self._get_raw(key, version)
+                if value is not None:
+                    return self._unwrap(value)
+
+        try:
+            start = time()
+            value = default() if callable(default) else default
+            if value is None:
+                return None
+            delta = time() - start
+            self._count('recomputes')
+
+            expires_at = None if timeout is None else time() + timeout
+            self.set(key, _Entry(value, expires_at, delta), timeout, version=version)
+            return value
+        finally:
+            # a lock that expired while waiting belongs to another process
+            if owns_lock:
+                self.delete(lock_key, version=version)
@@ -2,6 +2,7 @@ import os
 
 from celery import Celery
 from celery import Task
+from celery.signals import task_prerun
 
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
@@ -54,7 +55,10 @@ app = Celery(
     broker=get_env('CELERY_BROKER_URL'),
     backend=get_env('CELERY_RESULT_BACKEND', None),
     include=[
-        'config.celerytasks',
+        'apps.abstract.celerytasks',
+        'apps.config.celerytasks',
+        'apps.grievance.celerytasks',
+        'apps.person.celerytasks',
         'notification.celerytasks',
     ]
 )
@@ -72,3 +76,11 @@ app.conf.timezone = 'America/Sao_Paulo'
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks(lambda: [n.name for n in apps.get_app_configs()])
+
+
+@task_prerun.connect
+def reset_db_pinning(**kwargs):
+    # the worker threads are reused: a write of the previous task must not
+    # keep the next ones pinned to the primary database
+    from application.db.routers import reset_pinning
+    reset_pinning()
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+
+# Registry of the cached widgets of the admin dashboard (admin index). The
+# apps declare the widgets in a `dashboard` module (autodiscovered by
+# ConfigConfig.ready):
+#
+#     @dashboard_widget('grievances_by_week', models=['grievance.Grievance'])
+#     def grievances_by_week():
+#         return ...
+#
+# The result of each widget is cached until one of the listed models is
+# saved or deleted (or the timeout expires).
+
+DASHBOARD_WIDGET_KEY = 'dashboard:widget:%s'
+
+_widgets = {}
+
+
+def dashboard_widget(name, models=(), timeout=60 * 15):
+    def decorator(func):
+        _widgets[name] = (func, timeout)
+
+        def invalidate(**kwargs):
+            cache.delete(DASHBOARD_WIDGET_KEY % name)
+
+        # the receiver is kept alive by the registry (weak=False)
+        for model in models:
+            post_save.connect(invalidate, sender=model, weak=False, dispatch_uid='dashboard_%s_%s_save' % (name, model))
+            post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid='dashboard_%s_%s_delete' % (name, model))
+        return func
+    return decorator
+
+
+def get_dashboard_widget(name):
+    func, timeout = _widgets[name]
+    return cache.get_or_set(DASHBOARD_WIDGET_KEY % name, func, timeout)
+
+
+def get_dashboard_widgets() -> dict:
+    return {name: get_dashboard_widget(name) for name in _widgets}
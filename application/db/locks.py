@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+import uuid
+
+from django.core.cache import cache
+from django.db import connections
+
+
+# A lock held by a single process at a time (the rollups refresh, for
+# instance). On MySQL it is a GET_LOCK of the connection: it is released by
+# RELEASE_LOCK or when the connection closes, so a worker killed in the
+# middle doesn't keep it. Elsewhere (sqlite in the tests, a dev setup
+# without MySQL) it is a cache entry holding a token, released only by its
+# owner, so a run that outlived the timeout doesn't release the lock taken
+# by the next one.
+
+@contextmanager
+def named_lock(name, timeout=None, using='default'):
+    """ with named_lock(name) as acquired: ..., doesn't wait for the lock. """
+    connection = connections[using]
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", [name])
+            acquired = cursor.fetchone()[0] == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", [name])
+        return
+
+    key = 'lock:%s' % name
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
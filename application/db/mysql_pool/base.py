@@ -0,0 +1,38 @@
+"""
+MySQL database backend with an in-process connection pool.
+
+Set DATABASES[alias]['ENGINE'] to 'application.db.mysql_pool' and the pool
+options in DATABASES[alias]['POOL'] (see pool.ConnectionPool). CONN_MAX_AGE
+must be 0: Django "closes" the connection at the end of each request (or
+task), which gives it back to the pool.
+"""
+
+from django.db.backends.mysql import base
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict)
+        connect = super().get_new_connection
+        return pool.checkout(lambda: connect(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        # closed inside atomic(): Django keeps self.connection until the block
+        # exits, so it can't go back to the pool (it's closed, freeing the slot)
+        reusable = not self.in_atomic_block
+        try:
+            # never give back a connection in the middle of a transaction
+            if reusable and not self.get_autocommit():
+                self.connection.rollback()
+            if reusable and self.errors_occurred:
+                reusable = self.is_usable()
+        except Exception:
+            reusable = False
+
+        get_pool(self.alias, self.settings_dict).checkin(self.connection, reusable)
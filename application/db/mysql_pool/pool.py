@@ -0,0 +1,193 @@
+import logging
+import os
+import queue
+import threading
+from time import monotonic, perf_counter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+
+logger = logging.getLogger('application.db.pool')
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    __slots__ = ('connection', 'created_at', 'returned_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = monotonic()
+        self.returned_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of raw MySQLdb connections of one database alias.
+
+    At most size + max_overflow connections are checked out at the same time,
+    a checkout waits up to timeout seconds for a free one. Only `size` idle
+    connections are kept, the idle ones are reused LIFO (the hot connections
+    are reused and the cold ones expire), pinged when they were idle for more
+    than ping_after seconds and closed after recycle seconds of life.
+    """
+
+    def __init__(self, alias, size=5, max_overflow=5, timeout=10, recycle=3600, ping_after=30):
+        self.alias = alias
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.max_connections = size + max_overflow
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._lock = threading.Lock()
+        self._checked_out = {}
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def checkout(self, connect):
+        start = perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout("Nenhuma conexão livre no pool '%s' após %ss." % (self.alias, self.timeout))
+        wait = perf_counter() - start
+
+        try:
+            pooled = self._get_idle()
+            created = pooled is None
+            if created:
+                pooled = PooledConnection(connect())
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checked_out[id(pooled.connection)] = pooled
+            stats = self._stats
+            stats['checkouts'] += 1
+            stats['created' if created else 'reused'] += 1
+            stats['wait_time_total'] += wait
+            stats['wait_time_max'] = max(stats['wait_time_max'], wait)
+
+        return pooled.connection
+
+    def _get_idle(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            now = monotonic()
+            if now - pooled.created_at > self.recycle:
+                self._discard(pooled.connection)
+                continue
+
+            if now - pooled.returned_at > self.ping_after:
+                try:
+                    pooled.connection.ping()
+                except Exception:
+                    self._discard(pooled.connection)
+                    continue
+
+            return pooled
+
+    def checkin(self, connection, reusable=True):
+        with self._lock:
+            pooled = self._checked_out.pop(id(connection), None)
+
+        try:
+            if pooled is None or not reusable or self._idle.qsize() >= self.size:
+                self._discard(connection)
+            else:
+                pooled.returned_at = monotonic()
+                self._idle.put(pooled)
+        finally:
+            if pooled is not None:
+                self._slots.release()
+
+    def _discard(self, connection):
+        with self._lock:
+            self._stats['discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """ Close the idle connections. """
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(pooled.connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._checked_out)
+        stats['idle'] = self._idle.qsize()
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict) -> ConnectionPool:
+    global _pools, _pools_pid
+
+    pid = os.getpid()
+    if _pools_pid != pid:
+        with _pools_lock:
+            if _pools_pid != pid:
+                # forked: the inherited connections belong to the parent, they
+                # are dropped without closing (the parent socket stays open)
+                _pools = {}
+                _pools_pid = pid
+
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                options = settings_dict.get('POOL') or {}
+                try:
+                    pool = ConnectionPool(alias, **options)
+                except TypeError as e:
+                    raise ImproperlyConfigured("Opções inválidas em DATABASES['%s']['POOL']: %s" % (alias, e))
+                _pools[alias] = pool
+    return pool
+
+
+def pool_capacity(alias='default'):
+    """ Connections the alias can have checked out at once in this process, None when it isn't pooled. """
+    settings_dict = connections[alias].settings_dict
+    if settings_dict['ENGINE'] != 'application.db.mysql_pool':
+        return None
+    return get_pool(alias, settings_dict).max_connections
+
+
+def dispose_pools():
+    if _pools_pid == os.getpid():
+        for pool in _pools.values():
+            pool.dispose()
+
+
+def pool_stats() -> dict:
+    if _pools_pid != os.getpid():
+        return {}
+    return {alias: pool.stats() for alias, pool in _pools.items()}
@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import random
+from time import monotonic
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+logger = logging.getLogger('application.db.routers')
+
+
+# Reads go to a replica only when explicitly allowed (read_from_replica, or
+# SoftDeletionQuerySet.replica()), everything else keeps reading from the
+# primary, so the code that expects to see its own writes is never
+# surprised. After a write, the rest of the request (and the following
+# requests of the same client for REPLICA_PIN_SECONDS, see
+# ReplicaPinMiddleware) is pinned to the primary.
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+_replica_lag = {}
+
+# SHOW REPLICA STATUS (MySQL 8.0.22+, the only one in 8.4), SHOW SLAVE STATUS
+# on the older servers. The statement accepted by each replica is kept.
+_STATUS_QUERIES = (
+    ("SHOW REPLICA STATUS", 'Seconds_Behind_Source'),
+    ("SHOW SLAVE STATUS", 'Seconds_Behind_Master'),
+)
+_status_query = {}
+
+
+@contextmanager
+def read_from_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def reset_pinning():
+    _pinned.set(False)
+    _wrote.set(False)
+
+
+def wrote_to_primary() -> bool:
+    return _wrote.get()
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind the primary (None when unknown), checked
+    at most once per REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+    checked_at, lag = _replica_lag.get(alias, (None, None))
+    if checked_at is not None and monotonic() - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+
+    lag = None
+    try:
+        lag = _read_replica_lag(alias)
+    except Exception as e:
+        logger.warning("Falha ao verificar o atraso da réplica %s: %s", alias, e)
+
+    _replica_lag[alias] = (monotonic(), lag)
+    return lag
+
+
+def _read_replica_lag(alias):
+    queries = [_status_query[alias]] if alias in _status_query else _STATUS_QUERIES
+    for index, (query, column) in enumerate(queries):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(query)
+                row = cursor.fetchone()
+                columns = [c[0] for c in cursor.description]
+        except DatabaseError:
+            if index == len(queries) - 1:
+                raise
+            continue
+
+        _status_query[alias] = (query, column)
+        if row is None:
+            # not a replica
+            return None
+        # MariaDB answers SHOW REPLICA STATUS with the old column name
+        if column not in columns:
+            column = 'Seconds_Behind_Master'
+        return row[columns.index(column)]
+
+
+def get_read_replica(default='default'):
+    """
+    The alias of a healthy replica (lag known and below REPLICA_MAX_LAG) or
+    `default` when the context is pinned to the primary or no replica can
+    be used.
+    """
+    if _pinned.get() or not settings.DATABASE_REPLICAS:
+        return default
+
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        lag = replica_lag(alias)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            return alias
+    return default
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return get_read_replica()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same data of the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes across requests: a request that wrote to the primary
+    sets a short lived cookie and the next requests of the client, while the
+    cookie lasts, are pinned to the primary (the replica may not have the
+    write yet).
+    """
+    cookie_name = 'db_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_pinning()
+        if request.COOKIES.get(self.cookie_name):
+            pin_to_primary()
+
+        response = self.get_response(request)
+
+        if wrote_to_primary():
+            response.set_cookie(self.cookie_name, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
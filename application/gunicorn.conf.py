@@ -0,0 +1,62 @@
+"""
+Gunicorn config for the application.
+
+    gunicorn -c application/gunicorn.conf.py application.wsgi
+
+or, serving the async views through the ASGI application (GUNICORN_ASGI=True):
+
+    gunicorn -c application/gunicorn.conf.py application.asgi
+
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import multiprocessing
+
+from application.utils import get_env
+
+
+bind = get_env('GUNICORN_BIND', '127.0.0.1:8000')
+
+# the views are mostly I/O bound (database, external apis), so each worker
+# runs a few threads
+workers = int(get_env('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(get_env('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# uvicorn workers run the asgi application in an event loop: one process
+# holds many concurrent slow upstream calls of the async views, the sync
+# views run in the thread pool of asgiref
+if get_env('GUNICORN_ASGI', False, True):
+    workers = int(get_env('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1))
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+# load and warm up the application (application.warmup) in the master, the
+# workers are forked with the warm state shared copy-on-write
+preload_app = True
+
+# recycle the workers to bound memory growth, with jitter to not restart
+# all of them at the same time
+max_requests = int(get_env('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(get_env('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(get_env('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# the worker heartbeat file in memory instead of a disk backed /tmp
+worker_tmp_dir = '/dev/shm'
+
+# FileResponse (static and media files, apps.utils.files) sent with sendfile()
+sendfile = True
+
+accesslog = get_env('GUNICORN_ACCESS_LOG', None)
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # warm_up closes the connections of the master, but if something else
+    # opened one the child drops it (without closing the parent socket)
+    from django.db import connections
+
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
@@ -0,0 +1,110 @@
+import copy
+import logging
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+import os
+import queue
+import random
+import threading
+
+import orjson
+
+
+# Logging helpers referenced by the LOGGING dict of the settings. The file
+# handlers put the records in a queue and a QueueListener thread formats and
+# writes them, so a log call inside a request thread never waits for disk.
+
+
+class JSONFormatter(logging.Formatter):
+    """ One json object per line, serialized with orjson. """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+
+        return orjson.dumps(data, default=str).decode('utf-8')
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let only a fraction (rate) of the records below the given level pass.
+    Records at or above the level are never dropped. Used to thin noisy
+    DEBUG streams like django.db.backends.
+    """
+
+    def __init__(self, rate=1.0, level='INFO'):
+        super().__init__()
+        self.rate = float(rate)
+        self.levelno = logging._checkLevel(level)
+
+    def filter(self, record):
+        return record.levelno >= self.levelno or random.random() < self.rate
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    File handler that writes from a background QueueListener thread. The
+    message is resolved in the calling thread (the args may be mutable
+    objects) but the formatting and the disk I/O run in the listener.
+
+    Every worker process appends to the same file, so the handler doesn't
+    rotate it: logrotate does (see the README), and the WatchedFileHandler
+    reopens the file when it's moved.
+
+    The listener is started lazily in each process, so the handler can be
+    configured before a fork (gunicorn preload, celery prefork).
+    """
+
+    def __init__(self, filename, encoding='utf8'):
+        super().__init__(queue.SimpleQueue())
+        self.target = WatchedFileHandler(filename, encoding=encoding, delay=True)
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # the queue and the listener thread were left in the parent
+                self.queue = queue.SimpleQueue()
+            else:
+                # the log directory is created on the first record, not when
+                # the settings are imported
+                os.makedirs(os.path.dirname(self.target.baseFilename), exist_ok=True)
+            self.listener = QueueListener(self.queue, self.target)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
@@ -2,10 +2,11 @@ import os
 from os.path import abspath
 from os.path import dirname
 import secrets
+import sys
 
 from datetime import timedelta
 
-from .utils import get_env, create_file
+from .utils import get_env
 
 
 # main runtime system settings
@@ -15,8 +16,11 @@ BASE_DIR = dirname(CURRENT_DIR)
 ROOT_DIR = dirname(BASE_DIR)
 DEBUG = get_env('DEBUG', False, True)
 SITE_NAME = get_env('SITE_NAME', 'SITE NAME NOT SET')
+SITE_URL = get_env('SITE_URL', 'http://localhost:8000')
+SITE_ADMIN_URL = get_env('SITE_ADMIN_URL', SITE_URL + '/admin')
+SITE_ADDRESS = get_env('SITE_ADDRESS', '')
 ENVIRONMENT = get_env('ENVIRONMENT', 'production')
-SECRET_KEY = get_env('SECRET_KEY', secrets.token_hex(30))
+SECRET_KEY = get_env('SECRET_KEY') or secrets.token_hex(30)
 ALLOWED_HOSTS = get_env('ALLOWED_HOSTS', 'production').split()
 GITHUB_WEBHOOK_SECRET = get_env('GITHUB_WEBHOOK_SECRET', "")
 LOG_DIR = get_env('LOG_DIR', BASE_DIR + "/tmp/")
@@ -63,7 +67,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 INSTALLED_APPS = [
     'jazzmin',
-    'django.contrib.admin',
+    'application.apps.AdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -74,6 +78,7 @@ INSTALLED_APPS = [
     # third apps
     'simple_history',
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'tinymce',
     'post_office',
@@ -116,6 +121,9 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
+    # pin the client to the primary database for a while after a write
+    'application.db.routers.ReplicaPinMiddleware',
+
     # track and populate the user model chagens history automatically
     # https://django-simple-history.readthedocs.io/en/latest/quick_start.html#install
     'simple_history.middleware.HistoryRequestMiddleware',
@@ -172,27 +180,74 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'application.wsgi.application'
 
+# Load the urlconf, templates and caches when the wsgi/asgi application is
+# created (see application.warmup)
+WSGI_WARMUP = get_env('WSGI_WARMUP', True, True)
+
 
 # Database config
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# DATABASE_POOL_MODE:
+#   pool        in-process connection pool (application.db.mysql_pool)
+#   proxy       one short connection per request, for a pooling proxy
+#               (ProxySQL, RDS Proxy) in front of MySQL
+#   persistent  Django persistent connections (CONN_MAX_AGE) with health checks
+# The pool size depends on the process type: each web worker runs
+# GUNICORN_THREADS threads, each celery prefork process runs one task.
+
+DATABASE_POOL_MODE = get_env('DATABASE_POOL_MODE', 'pool')
+PROCESS_TYPE = get_env('PROCESS_TYPE', 'celery' if 'celery' in os.path.basename(sys.argv[0]) else 'web')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'application.db.mysql_pool' if DATABASE_POOL_MODE == 'pool' else 'django.db.backends.mysql',
         'NAME': get_env('DATABASE_NAME', ""),
         'USER': get_env('DATABASE_USER', ""),
         'PASSWORD': get_env('DATABASE_PASS', ""),
         'HOST': get_env('DATABASE_HOST', ""),
         'PORT': get_env('DATABASE_PORT', 3306),
-        'CONN_MAX_AGE': 60,
+        'CONN_MAX_AGE': 60 if DATABASE_POOL_MODE == 'persistent' else 0,
+        'CONN_HEALTH_CHECKS': DATABASE_POOL_MODE == 'persistent',
         'TIME_ZONE': 'America/Sao_Paulo',
         'OPTIONS': {
             'ssl': ENVIRONMENT == 'production'
-        }
+        },
+        'POOL': {
+            'size': int(get_env('DATABASE_POOL_SIZE_CELERY', 1) if PROCESS_TYPE == 'celery' else get_env('DATABASE_POOL_SIZE_WEB', 4)),
+            'max_overflow': int(get_env('DATABASE_POOL_MAX_OVERFLOW', 2)),
+            'timeout': int(get_env('DATABASE_POOL_TIMEOUT', 10)),
+            'recycle': int(get_env('DATABASE_POOL_RECYCLE', 3600)),
+            'ping_after': int(get_env('DATABASE_POOL_PING_AFTER', 30)),
+        },
     }
 }
 
 
+# Read replicas (space separated hosts), used only by the reads allowed to go
+# to a replica (see application.db.routers). A replica behind the primary more
+# than REPLICA_MAX_LAG seconds is skipped. The lag is read with SHOW REPLICA
+# STATUS, the replica user needs the REPLICATION CLIENT privilege (without it
+# every read goes to the primary).
+
+DATABASE_REPLICA_HOSTS = get_env('DATABASE_REPLICA_HOSTS', "").split()
+
+for index, host in enumerate(DATABASE_REPLICA_HOSTS):
+    DATABASES['replica_%d' % index] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'USER': get_env('DATABASE_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': get_env('DATABASE_REPLICA_PASS', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['application.db.routers.ReplicaRouter']
+REPLICA_MAX_LAG = int(get_env('REPLICA_MAX_LAG', 5))
+REPLICA_LAG_CHECK_INTERVAL = int(get_env('REPLICA_LAG_CHECK_INTERVAL', 10))
+REPLICA_PIN_SECONDS = int(get_env('REPLICA_PIN_SECONDS', 10))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -258,6 +313,24 @@ STATICFILES_FINDERS = (
     'django.contrib.staticfiles.finders.AppDirectoriesFinder',
 )
 
+# Hashed file names (manifest) plus gzip/brotli copies written by collectstatic
+# https://docs.djangoproject.com/en/4.2/ref/settings/#storages
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'application.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Serve static and media files through django (apps.utils.files), only when
+# there is no front proxy serving them. With a front nginx, the media files
+# can be sent by it through X-Accel-Redirect (an internal location mapped to
+# MEDIA_ROOT, e.g. /protected-media/)
+SERVE_FILES = get_env('SERVE_FILES', False, True)
+MEDIA_ACCEL_REDIRECT_PREFIX = get_env('MEDIA_ACCEL_REDIRECT_PREFIX', None)
+
 # The dynamic path used in production where django save attached files
 # like images and docs.
 
@@ -284,13 +357,13 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 9,
     'COERCE_DECIMAL_TO_STRING': False,
     'DEFAULT_METADATA_CLASS': None,
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.abstract.pagination.KeysetPagination',
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'apps.utils.renderers.ORJSONRenderer',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.config.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -298,7 +371,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'apps.utils.parsers.ORJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FileUploadParser',
         'rest_framework.parsers.FormParser',
@@ -306,6 +379,29 @@ REST_FRAMEWORK = {
 }
 
 
+# The max page size a client can request through the page_size query param
+# in the api (KeysetPagination)
+
+API_MAX_PAGE_SIZE = int(get_env('API_MAX_PAGE_SIZE', 100))
+
+
+# Paginators (admin and api) read the count of AbstractModel tables from a
+# cached alive counter. Tables with less rows than the threshold (by the
+# information_schema estimate) are always counted exactly.
+
+APPROXIMATE_COUNT_THRESHOLD = int(get_env('APPROXIMATE_COUNT_THRESHOLD', 10000))
+ALIVE_COUNTER_TIMEOUT = int(get_env('ALIVE_COUNTER_TIMEOUT', 60 * 15))
+
+
+# History rows of the models using BufferedHistoricalRecords are written in
+# batches of HISTORY_BATCH_SIZE when a history_buffer() block ends (the admin
+# changelist, for instance), see apps.abstract.history. Disabled, they are
+# saved one by one.
+
+HISTORY_BUFFER_ENABLED = get_env('HISTORY_BUFFER_ENABLED', True, True)
+HISTORY_BATCH_SIZE = int(get_env('HISTORY_BATCH_SIZE', 500))
+
+
 # Settings for django-htmlmin
 # https://github.com/cobrateam/django-htmlmin
 
@@ -340,8 +436,12 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=2),
     'ROTATE_REFRESH_TOKENS': True,
+    # the rotated refresh tokens are blacklisted in the database (token_blacklist)
+    # and in the cache (apps.config.authentication). last_login is written at
+    # most once per LAST_LOGIN_UPDATE_INTERVAL by the token obtain serializer
+    # of apps.config.authentication instead of on every login
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS512',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -358,6 +458,40 @@ SIMPLE_JWT = {
 }
 
 
+LAST_LOGIN_UPDATE_INTERVAL = int(get_env('LAST_LOGIN_UPDATE_INTERVAL', 60 * 60))
+
+
+# Sessions in the cache, backed by the database (a read of an existing
+# session rarely hits the database). The signed_cookies engine is also an
+# option (no server storage, but the session data is visible to the client)
+# https://docs.djangoproject.com/en/4.0/topics/http/sessions/#configuring-the-session-engine
+
+SESSION_ENGINE = get_env('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
+
+# Failed admin logins allowed per ip and per username before the login is
+# locked for LOGIN_LOCKOUT_WINDOW seconds (apps.config.views.login_view)
+
+LOGIN_MAX_FAILURES_PER_IP = int(get_env('LOGIN_MAX_FAILURES_PER_IP', 20))
+LOGIN_MAX_FAILURES_PER_USER = int(get_env('LOGIN_MAX_FAILURES_PER_USER', 5))
+LOGIN_LOCKOUT_WINDOW = int(get_env('LOGIN_LOCKOUT_WINDOW', 60 * 15))
+
+
+# Number of reverse proxies (load balancer, nginx) in front of the
+# application. The client ip used by the login and password reset limits is
+# the one the outermost trusted proxy saw (X-Forwarded-For), 0 uses
+# REMOTE_ADDR (apps.utils.utils.get_client_ip)
+
+TRUSTED_PROXY_COUNT = int(get_env('TRUSTED_PROXY_COUNT', 1))
+
+
+# Password reset requests allowed per ip and per email in the window (seconds)
+
+PASSWORD_RESET_RATE_PER_IP = int(get_env('PASSWORD_RESET_RATE_PER_IP', 10))
+PASSWORD_RESET_RATE_PER_EMAIL = int(get_env('PASSWORD_RESET_RATE_PER_EMAIL', 3))
+PASSWORD_RESET_RATE_WINDOW = int(get_env('PASSWORD_RESET_RATE_WINDOW', 60 * 60))
+
+
 # POST_OFFICE async email lib settings
 # https://github.com/ui/django-post_office
 
@@ -550,14 +684,88 @@ ADMINS = [
 ]
 
 
+# Grievance imports (apps.grievance.ingest): records read and committed per
+# chunk (one checkpoint each), rows per INSERT and concurrent cep lookups.
+# The addresses found are cached for CEP_CACHE_TIMEOUT seconds.
+
+GRIEVANCE_INGEST_CHUNK_SIZE = int(get_env('GRIEVANCE_INGEST_CHUNK_SIZE', 5000))
+GRIEVANCE_INGEST_BATCH_SIZE = int(get_env('GRIEVANCE_INGEST_BATCH_SIZE', 1000))
+GRIEVANCE_INGEST_CEP_LOOKUP = get_env('GRIEVANCE_INGEST_CEP_LOOKUP', True, True)
+GRIEVANCE_INGEST_CEP_CONCURRENCY = int(get_env('GRIEVANCE_INGEST_CEP_CONCURRENCY', 20))
+CEP_CACHE_TIMEOUT = int(get_env('CEP_CACHE_TIMEOUT', 60 * 60 * 24 * 30))
+
+
+# Grievance rollups (apps.grievance.rollups): the dirty days are rebuilt
+# every GRIEVANCE_ROLLUP_REFRESH_INTERVAL seconds by the celery beat,
+# GRIEVANCE_ROLLUP_BATCH_DAYS days per transaction. A single refresh runs at
+# a time (MySQL GET_LOCK, without MySQL a cache lock expiring after
+# GRIEVANCE_ROLLUP_LOCK_TIMEOUT seconds)
+
+GRIEVANCE_ROLLUP_REFRESH_INTERVAL = int(get_env('GRIEVANCE_ROLLUP_REFRESH_INTERVAL', 60 * 5))
+GRIEVANCE_ROLLUP_BATCH_DAYS = int(get_env('GRIEVANCE_ROLLUP_BATCH_DAYS', 31))
+GRIEVANCE_ROLLUP_LOCK_TIMEOUT = int(get_env('GRIEVANCE_ROLLUP_LOCK_TIMEOUT', 60 * 30))
+
+CELERY_BEAT_SCHEDULE = {
+    'refresh-grievance-rollups': {
+        'task': 'apps.grievance.celerytasks.refresh_grievance_rollups',
+        'schedule': GRIEVANCE_ROLLUP_REFRESH_INTERVAL,
+    },
+}
+
+
+# Batch deduplication of the persons (apps.person.dedup): blocks per chunk
+# and chunks processed in parallel (at most the connections of the pool but
+# one, see DATABASES POOL)
+
+PERSON_DEDUP_CHUNK_SIZE = int(get_env('PERSON_DEDUP_CHUNK_SIZE', 500))
+PERSON_DEDUP_WORKERS = int(get_env('PERSON_DEDUP_WORKERS', 4))
+
+
+# Pool of the async http client (apps.utils.async_utils)
+
+ASYNC_HTTP_TIMEOUT = float(get_env('ASYNC_HTTP_TIMEOUT', 30))
+ASYNC_HTTP_MAX_CONNECTIONS = int(get_env('ASYNC_HTTP_MAX_CONNECTIONS', 100))
+ASYNC_HTTP_MAX_KEEPALIVE = int(get_env('ASYNC_HTTP_MAX_KEEPALIVE', 20))
+
+
+# Seconds the admin app list (sidebar menu) is cached by permission set
+# (application.admin.CachedAdminSite) and max-age of the public assets
+# (robots.txt, favicon and the media files of the login page)
+
+ADMIN_MENU_CACHE_TIMEOUT = int(get_env('ADMIN_MENU_CACHE_TIMEOUT', 60 * 60))
+ASSETS_CACHE_MAX_AGE = int(get_env('ASSETS_CACHE_MAX_AGE', 60 * 60 * 24))
+
+
+# Seconds the config.Setting rows are kept in the process cache
+# (apps.config.utils.get_setting)
+
+SETTING_CACHE_TIMEOUT = int(get_env('SETTING_CACHE_TIMEOUT', 60))
+
+
+# Cold start budget (ms) checked by `manage.py startup_report --check` in the CI
+# (the wsgi one by the apps.config tests too)
+
+STARTUP_BUDGET_MS = {
+    'wsgi': int(get_env('STARTUP_BUDGET_WSGI_MS', 3000)),
+    'celery': int(get_env('STARTUP_BUDGET_CELERY_MS', 4000)),
+}
+
+
 # settings by runtime env
 # logging
 
-create_file(LOG_DIR + '/application-debug.log', "")
+# rotation and flush of the files written by apps.utils.utils.create_log
+# (rotated by the application, keep them out of logrotate, see the README)
+LOG_SINK_MAX_BYTES = int(get_env('LOG_SINK_MAX_BYTES', 10 * 1024 * 1024))
+LOG_SINK_ROTATE_INTERVAL = int(get_env('LOG_SINK_ROTATE_INTERVAL', 24 * 60 * 60))
+LOG_SINK_FLUSH_INTERVAL = float(get_env('LOG_SINK_FLUSH_INTERVAL', 1.0))
+
+LOG_DEBUG_SAMPLE_RATE = float(get_env('LOG_DEBUG_SAMPLE_RATE', 0.1))
 
 if ENVIRONMENT in ['production', 'teste']:
     # The application log handlers
     # https://docs.djangoproject.com/en/4.0/topics/logging/
+    # The file handlers write through a queue (application.log.QueueFileHandler)
     LOGGING = {
         'version': 1,
         'disable_existing_loggers': False,
@@ -570,6 +778,9 @@ if ENVIRONMENT in ['production', 'teste']:
                 'format': '{levelname} {message}',
                 'style': '{',
             },
+            'json': {
+                '()': 'application.log.JSONFormatter',
+            },
         },
         'filters': {
             'require_debug_true': {
@@ -585,8 +796,9 @@ if ENVIRONMENT in ['production', 'teste']:
             },
             'file': {
                 'level': 'DEBUG',
-                'class': 'logging.FileHandler',
+                'class': 'application.log.QueueFileHandler',
                 'filename': LOG_DIR + '/application-debug.log',
+                'formatter': 'json',
             },
             'null': {
                 'level': 'DEBUG',
@@ -594,8 +806,9 @@ if ENVIRONMENT in ['production', 'teste']:
             },
             'suspicious_log': {
                 'level': 'ERROR',
-                'class': 'logging.FileHandler',
+                'class': 'application.log.QueueFileHandler',
                 'filename': LOG_DIR + '/suspicious-request.log',
+                'formatter': 'json',
             },
         },
         'loggers': {
@@ -620,11 +833,25 @@ else:
     LOGGING = {
         'version': 1,
         'disable_existing_loggers': False,
+        'formatters': {
+            'json': {
+                '()': 'application.log.JSONFormatter',
+            },
+        },
+        'filters': {
+            # only a sample of the DEBUG records of the noisy loggers
+            'sample_debug': {
+                '()': 'application.log.SamplingFilter',
+                'rate': LOG_DEBUG_SAMPLE_RATE,
+                'level': 'INFO',
+            },
+        },
         'handlers': {
             'file': {
                 'level': 'DEBUG',
-                'class': 'logging.FileHandler',
+                'class': 'application.log.QueueFileHandler',
                 'filename': LOG_DIR + '/application-debug.log',
+                'formatter': 'json',
             },
         },
         'loggers': {
@@ -633,24 +860,45 @@ else:
                 'level': 'DEBUG',
                 'propagate': True,
             },
+            'django.db.backends': {
+                'handlers': ['file'],
+                'level': 'DEBUG',
+                'filters': ['sample_debug'],
+                'propagate': False,
+            },
+            'django.template': {
+                'handlers': ['file'],
+                'level': 'DEBUG',
+                'filters': ['sample_debug'],
+                'propagate': False,
+            },
         },
     }
 
 
 # cache
 # https://docs.djangoproject.com/en/4.0/topics/cache
+# Every environment uses the same two tier cache (application.cache): an
+# in-process LRU in front of memcached. Without memcached (empty
+# MEMCACHED_LOCATION or server down) only the local tier is used.
 
-if ENVIRONMENT in ['production', 'teste']:
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
-            'LOCATION': '127.0.0.1:11211',
+CACHES = {
+    'default': {
+        'BACKEND': 'application.cache.TwoTierCache',
+        'LOCATION': get_env('MEMCACHED_LOCATION', '127.0.0.1:11211' if ENVIRONMENT in ['production', 'teste'] else ""),
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': int(get_env('CACHE_LOCAL_MAX_ENTRIES', 5000)),
+            'LOCAL_TIMEOUT': int(get_env('CACHE_LOCAL_TIMEOUT', 5)),
+            'PREFIX_TIMEOUTS': {
+                'abstract:alive-count:': ALIVE_COUNTER_TIMEOUT,
+            },
         },
-        'staticfiles': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-            'LOCATION': 'staticfiles-filehashes'
-        }
+    },
+    'staticfiles': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'staticfiles-filehashes'
     }
+}
 
 
 # sentry
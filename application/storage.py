@@ -0,0 +1,58 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage (hashed file names, safe to cache forever) that
+    also writes gzip and brotli (when the Brotli package is installed) copies
+    of the text assets at collectstatic time, so they are never compressed
+    per request (see apps.utils.files.serve_file or the gzip_static/
+    brotli_static directives of nginx).
+    """
+    compress_extensions = ('.css', '.js', '.svg', '.txt', '.json', '.html', '.xml', '.map', '.ico', '.ttf', '.eot')
+    compress_min_size = 1024
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_files = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_files.append(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for hashed_name in set(hashed_files):
+            if hashed_name.endswith(self.compress_extensions):
+                self.compress(self.path(hashed_name))
+
+    def compress(self, path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        if len(content) < self.compress_min_size:
+            return
+
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            with open(path + '.gz', 'wb') as f:
+                f.write(compressed)
+
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                with open(path + '.br', 'wb') as f:
+                    f.write(compressed)
+
+        # keep the compressed copies with the same mtime of the original
+        stat = os.stat(path)
+        for ext in ('.gz', '.br'):
+            if os.path.exists(path + ext):
+                os.utime(path + ext, (stat.st_atime, stat.st_mtime))
@@ -0,0 +1,163 @@
+import threading
+from time import sleep
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import ProgrammingError
+from django.test import SimpleTestCase
+
+from application.cache import TwoTierCache
+from application.db import routers
+
+
+def make_cache(remote=False, **options):
+    cache = TwoTierCache('', {'OPTIONS': {'LOCAL_TIMEOUT': 0.05, **options}})
+    if remote:
+        # a locmem cache stands for memcached
+        cache._remote = LocMemCache('two-tier-tests', {})
+        cache._remote.clear()
+    return cache
+
+
+class TwoTierCacheTests(SimpleTestCase):
+
+    def test_local_only_keeps_the_timeout(self):
+        cache = make_cache()
+        cache.set('key', 'value', 10)
+        sleep(0.1)
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_local_only_without_timeout(self):
+        cache = make_cache()
+        cache.set('key', 'value', None)
+        sleep(0.1)
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_local_copy_expires_in_front_of_the_remote(self):
+        cache = make_cache(remote=True)
+        cache.set('key', 'value', 10)
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.stats()['local_hits'], 1)
+
+        # another process changed the value
+        cache._remote.set('key', 'changed', 10)
+        sleep(0.1)
+        self.assertEqual(cache.get('key'), 'changed')
+        self.assertEqual(cache.stats()['remote_hits'], 1)
+
+    def test_remote_entry_without_expiration(self):
+        cache = make_cache(remote=True)
+        self.assertEqual(cache.get_or_set('key', 'value', None), 'value')
+        cache._local.clear()
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.get_or_set('key', 'other', None), 'value')
+
+    def test_local_entries_are_bounded(self):
+        cache = make_cache(LOCAL_MAX_ENTRIES=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'c': 3})
+
+    def test_local_add_is_atomic(self):
+        cache = make_cache()
+        results = []
+
+        def add():
+            results.append(cache.add('key', threading.get_ident(), 10))
+
+        threads = [threading.Thread(target=add) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+
+    def test_local_incr_is_atomic(self):
+        cache = make_cache()
+        cache.set('counter', 0, 10)
+
+        def incr():
+            for _ in range(200):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=incr) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get('counter'), 1000)
+
+    def test_local_incr_of_a_missing_key(self):
+        with self.assertRaises(ValueError):
+            make_cache().incr('missing')
+
+    def test_get_or_set_keeps_a_lock_it_does_not_own(self):
+        cache = make_cache(LOCK_TIMEOUT=0.1)
+        # another process is computing the value
+        cache.add('key:lock', 1, 10)
+
+        self.assertEqual(cache.get_or_set('key', lambda: 'value', 10), 'value')
+        self.assertTrue(cache.has_key('key:lock'))
+
+    def test_get_or_set_releases_its_lock(self):
+        cache = make_cache()
+        self.assertEqual(cache.get_or_set('key', lambda: 'value', 10), 'value')
+        self.assertFalse(cache.has_key('key:lock'))
+        self.assertEqual(cache.stats()['recomputes'], 1)
+
+
+class FakeCursor:
+    """ Cursor of a replica answering only the statements of `results` ({query: (columns, row)}). """
+
+    def __init__(self, results, executed):
+        self.results = results
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query):
+        self.executed.append(query)
+        if query not in self.results:
+            raise ProgrammingError("You have an error in your SQL syntax")
+        columns, self.row = self.results[query]
+        self.description = [(column,) for column in columns]
+
+    def fetchone(self):
+        return self.row
+
+
+class ReplicaLagTests(SimpleTestCase):
+
+    def lag(self, results):
+        executed = []
+        connection = mock.Mock()
+        connection.cursor.side_effect = lambda: FakeCursor(results, executed)
+        with mock.patch.object(routers, 'connections', {'replica': connection}), \
+                mock.patch.dict(routers._status_query, clear=True):
+            lags = [routers._read_replica_lag('replica') for _ in range(2)]
+        return lags, executed
+
+    def test_replica_status(self):
+        lags, executed = self.lag({"SHOW REPLICA STATUS": (['Replica_IO_State', 'Seconds_Behind_Source'], ('', 3))})
+        self.assertEqual(lags, [3, 3])
+        self.assertEqual(executed, ["SHOW REPLICA STATUS"] * 2)
+
+    def test_older_servers(self):
+        lags, executed = self.lag({"SHOW SLAVE STATUS": (['Slave_IO_State', 'Seconds_Behind_Master'], ('', 7))})
+        self.assertEqual(lags, [7, 7])
+        # the accepted statement is kept
+        self.assertEqual(executed, ["SHOW REPLICA STATUS", "SHOW SLAVE STATUS", "SHOW SLAVE STATUS"])
+
+    def test_mariadb(self):
+        lags, _ = self.lag({"SHOW REPLICA STATUS": (['Slave_IO_State', 'Seconds_Behind_Master'], ('', 0))})
+        self.assertEqual(lags, [0, 0])
+
+    def test_not_a_replica(self):
+        lags, _ = self.lag({"SHOW REPLICA STATUS": (['Seconds_Behind_Source'], None)})
+        self.assertEqual(lags, [None, None])
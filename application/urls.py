@@ -1,17 +1,20 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include
 from django.urls import path
 from django.urls import re_path
+from django.views.decorators.cache import cache_control
 from django.views.generic.base import RedirectView
-from django.views.generic.base import TemplateView
 
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.views import TokenVerifyView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from apps.config import views as config_views
+from apps.config.authentication import CachedBlacklistTokenRefreshSerializer
+from apps.config.authentication import CoalescedLastLoginTokenObtainPairSerializer
+from apps.grievance import views as grievance_views
+from apps.utils.files import file_patterns, serve_media, serve_static
 
 admin.site.index_template = settings.BASE_DIR + "/templates/admin/index.html"
 admin.autodiscover()
@@ -36,13 +39,23 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 
     # rest framework auth (token creation and refresh)
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/', TokenObtainPairView.as_view(serializer_class=CoalescedLastLoginTokenObtainPairSerializer), name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=CachedBlacklistTokenRefreshSerializer), name='token_refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
 
     # manifest, icons and logo
-    path('favicon.ico', RedirectView.as_view(url=settings.MEDIA_URL + "assets/favicon.ico")),
-    path('robots.txt', TemplateView.as_view(template_name="robots.txt", content_type="text/plain")),
+    path('favicon.ico', cache_control(public=True, max_age=settings.ASSETS_CACHE_MAX_AGE)(RedirectView.as_view(url=settings.MEDIA_URL + "assets/favicon.ico", permanent=True))),
+    path('robots.txt', config_views.robots_txt),
+
+    # async endpoints (address lookup by cep and celery broker status)
+    path('api/cep/<str:cep>/', config_views.cep_lookup, name='cep_lookup'),
+    path('api/celery-status/', config_views.celery_status, name='celery_status'),
+
+    # database connection pool metrics (wait time and connection churn)
+    path('api/db-pool-stats/', config_views.db_pool_stats, name='db_pool_stats'),
+
+    # grievance counts by period and dimension (read from the rollups)
+    path('api/grievance-stats/', grievance_views.grievance_stats, name='grievance_stats'),
 
     # request to create new password view (with email input form)
     path('accounts/password-reset/', config_views.password_reset, name="password_reset"),
@@ -52,4 +65,12 @@ urlpatterns = [
 
     # last password view with only success message
     re_path('reset/done/', config_views.PasswordResetCompleteViewCustom.as_view(template_name='accounts/password_reset_complete.html'), name='password_reset_complete'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
+
+# static and media files served by django (development, or when there is
+# no front proxy serving them, see SERVE_FILES)
+if settings.DEBUG or settings.SERVE_FILES:
+    urlpatterns += file_patterns(settings.MEDIA_URL, serve_media)
+
+if settings.SERVE_FILES:
+    urlpatterns += file_patterns(settings.STATIC_URL, serve_static)
\ No newline at end of file
@@ -30,12 +30,21 @@ def create_file(file_name: str, content: str):
         f.write(content)
 
 
-if os.environ.get('ENV_LOADED') == None:
-    # initialize environment variables only once
+def load_env():
+    # initialize environment variables only once per process tree (the
+    # ENV_LOADED flag is inherited by the forked and spawned children)
+    if os.environ.get('ENV_LOADED') is not None:
+        return
 
     os.environ.setdefault('ENV_LOADED', '1')
 
-    dotenv_path = '/home/es204/.env'
-    dotenv_path = dotenv_path if os.path.exists(dotenv_path) else dirname(abspath(__file__)) + '/.env'
+    # DOTENV_PATH skips the lookup of the server .env file
+    dotenv_path = os.environ.get('DOTENV_PATH')
+    if dotenv_path is None:
+        dotenv_path = '/home/es204/.env'
+        dotenv_path = dotenv_path if os.path.exists(dotenv_path) else dirname(abspath(__file__)) + '/.env'
 
     load_dotenv(dotenv_path)
+
+
+load_env()
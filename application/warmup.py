@@ -0,0 +1,78 @@
+import gc
+import logging
+import os
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template import engines
+from django.template.exceptions import TemplateDoesNotExist, TemplateSyntaxError
+from django.urls import get_resolver, reverse
+
+from application.db.mysql_pool.pool import dispose_pools
+
+
+logger = logging.getLogger('application.warmup')
+
+
+def _warm_urls():
+    # compiles every url pattern (admin autodiscover runs on the urlconf import)
+    resolver = get_resolver()
+    resolver.reverse_dict
+    reverse('admin:index')
+
+
+def _warm_templates():
+    # the cached template loader keeps the compiled templates in memory
+    for engine in engines.all():
+        for template_dir in engine.template_dirs:
+            for root, _, files in os.walk(template_dir):
+                for file_name in files:
+                    if not file_name.endswith(('.html', '.txt')):
+                        continue
+                    try:
+                        engine.get_template(os.path.relpath(os.path.join(root, file_name), template_dir))
+                    except (TemplateDoesNotExist, TemplateSyntaxError):
+                        pass
+
+
+def _warm_caches():
+    from apps.config.utils import load_settings
+
+    # best effort: the database may be down or not migrated yet (the first
+    # deploy), the settings are then loaded by the first request
+    try:
+        load_settings()
+    except DatabaseError as e:
+        logger.warning("Warm up: config.Setting não carregado: %s", e)
+
+
+def warm_up():
+    """
+    Load everything the first request of a worker would otherwise pay for:
+    the urlconf (and the admin registry), the compiled templates and the
+    config.Setting cache. It's best effort, a failure is logged and never
+    stops the worker from starting.
+
+    With gunicorn preload_app it runs once in the master, before the fork,
+    so the workers inherit the warm state copy-on-write. The database
+    connections opened here are closed (and the pooled ones disposed), a
+    connection must never be shared between forked processes.
+    """
+    if not settings.WSGI_WARMUP:
+        return
+
+    try:
+        _warm_urls()
+        _warm_templates()
+        _warm_caches()
+    except Exception:
+        logger.exception("Warm up interrompido")
+    finally:
+        connections.close_all()
+        dispose_pools()
+
+    # the objects loaded so far live until the process exits: move them to
+    # the permanent generation so the gc of the workers never touches (and
+    # copies) their memory pages
+    gc.collect()
+    gc.freeze()
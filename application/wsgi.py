@@ -9,16 +9,20 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 
 import os
 import sys
-from os.path import dirname
+from os.path import abspath, dirname
 
-from django.core.wsgi import get_wsgi_application
+_BASE_DIR = dirname(dirname(abspath(__file__)))
+
+# allow to run the application from another working directory
+if _BASE_DIR not in sys.path:
+    sys.path.append(_BASE_DIR)
 
-_CURRENT_DIR = dirname(__file__)
-_CURRENT_PARENT_DIR = dirname(_CURRENT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django.settings')
+from django.core.wsgi import get_wsgi_application
 
-sys.path.append(_CURRENT_DIR)
-sys.path.append(_CURRENT_PARENT_DIR)
+from application.warmup import warm_up
 
 application = get_wsgi_application()
+
+warm_up()
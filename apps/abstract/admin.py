@@ -1,3 +1,24 @@
 from django.contrib import admin
 
-# Register your models here.
+from application.db.routers import read_from_replica
+
+from .pagination import ApproximateCountPaginator
+
+
+class AbstractModelAdmin(admin.ModelAdmin):
+    """
+    Base ModelAdmin for AbstractModel subclasses. Uses the cached alive
+    counter to paginate the changelist and skips the second COUNT(*) query
+    the admin runs to show the unfiltered total when a filter is applied.
+    The changelist is read from a replica (unless the client just wrote).
+    """
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        # POST requests are the changelist bulk actions
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+
+        with read_from_replica():
+            return super().changelist_view(request, extra_context)
@@ -1,7 +1,17 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_save
 
 
 class AbstractConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.abstract'
     verbose_name = 'Abstratas'
+
+    def ready(self):
+        from .counters import alive_counter_on_save
+        from .models import AbstractModel
+
+        # keep the alive counter of each concrete AbstractModel in sync
+        for model in apps.get_models():
+            if issubclass(model, AbstractModel):
+                post_save.connect(alive_counter_on_save, sender=model, dispatch_uid='alive_counter_%s' % model._meta.label_lower)
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.utils.dateparse import parse_datetime
+
+from application.celery import app
+
+
+@app.task(ignore_result=True)
+def write_deferred_history_rows(data: str, history_type: str, users: list, dates: list):
+    """
+    Write the history rows of the instances of a model declared with
+    BufferedHistoricalRecords(defer=True), serialized by HistoryBuffer.flush.
+    """
+    from .history import write_history_rows
+
+    instances = [deserialized.object for deserialized in serializers.deserialize('json', data)]
+    if not instances:
+        return
+
+    user_model = get_user_model()
+    found = user_model._default_manager.in_bulk({pk for pk in users if pk is not None})
+    for instance, user_pk, date in zip(instances, users, dates):
+        instance._history_user = found.get(user_pk)
+        instance._history_date = parse_datetime(date)
+
+    write_history_rows(instances[0].__class__, instances, history_type)
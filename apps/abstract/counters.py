@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+# Cached per-model counter of alive (not soft-deleted) rows, used by the
+# approximate paginators to avoid running a SELECT COUNT(*) for every list
+# page. The counter is updated incrementally on create and soft delete and is
+# rebuilt from the database when it expires.
+
+ALIVE_COUNTER_KEY = 'abstract:alive-count:%s'
+
+
+def alive_counter_key(model) -> str:
+    return ALIVE_COUNTER_KEY % model._meta.label_lower
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Return the storage engine row estimate for the model table or None when
+    the database backend doesn't expose one. On InnoDB the value of
+    information_schema.TABLES.TABLE_ROWS is an approximation (commonly within
+    10% of the real value) but reading it is O(1).
+    """
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [model._meta.db_table])
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None:
+        return None
+    return int(row[0])
+
+
+def get_alive_count(model, using='default') -> int:
+    key = alive_counter_key(model)
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    # small tables are cheap to count, so keep them exact
+    count = estimated_row_count(model, using)
+    if count is None or count < settings.APPROXIMATE_COUNT_THRESHOLD:
+        count = model.objects.using(using).count()
+
+    cache.set(key, count, settings.ALIVE_COUNTER_TIMEOUT)
+    return count
+
+
+def incr_alive_count(model, delta=1):
+    # the counter is only adjusted when it already exists, a missing key
+    # will be rebuilt from the database by the next get_alive_count call
+    try:
+        if delta >= 0:
+            cache.incr(alive_counter_key(model), delta)
+        else:
+            cache.decr(alive_counter_key(model), -delta)
+    except ValueError:
+        pass
+
+
+def reset_alive_count(model):
+    cache.delete(alive_counter_key(model))
+
+
+def alive_counter_on_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not instance.is_deleted:
+        incr_alive_count(sender)
@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import copy
+
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+from django.utils import timezone
+
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.models import HistoricalRecords
+from simple_history.utils import bulk_create_with_history as _bulk_create_with_history
+from simple_history.utils import bulk_update_with_history as _bulk_update_with_history
+from simple_history.utils import get_history_manager_for_model
+
+from .counters import reset_alive_count
+
+
+# Inside history_buffer(), the history rows of the models declared with
+# BufferedHistoricalRecords are not saved one by one: a snapshot of each
+# saved instance is kept (one per object, a creation followed by changes is
+# a single '+' row with the last state) and the rows are written when the
+# block ends, with one bulk_history_create per history model and type. The
+# block is a transaction, the rows are written in it, with the data, and
+# dropped with it on an error. A model declared with defer=True writes its
+# rows in a celery task, after the commit. A savepoint rolled back inside
+# the block must be a nested history_buffer(), to drop its rows too.
+# Outside history_buffer(), with HISTORY_BUFFER_ENABLED off, for deletions
+# and for models with m2m history, the rows are saved right away, as
+# simple_history does. The buffered rows don't send the
+# pre/post_create_historical_record signals (bulk_history_create doesn't).
+
+_buffer = ContextVar('history_buffer', default=None)
+
+
+class HistoryBuffer:
+    """ Snapshots of the saved instances whose history rows are not written yet. """
+
+    def __init__(self, using=None):
+        self.using = using
+        self.entries = {}
+
+    def add(self, instance, history_type, history_user, defer=False):
+        snapshot = copy(instance)
+        snapshot._history_user = history_user
+        snapshot._history_date = getattr(instance, '_history_date', None) or timezone.now()
+        self._put((instance.__class__, instance.pk), (snapshot, history_type, defer))
+
+    def merge(self, other):
+        for key, entry in other.entries.items():
+            self._put(key, entry)
+
+    def _put(self, key, entry):
+        previous = self.entries.get(key)
+        if previous is not None and previous[1] == '+':
+            # created in the block, a single creation row with the last state
+            entry = (entry[0], '+', entry[2])
+        # the key keeps its position (the order of the first save)
+        self.entries[key] = entry
+
+    def flush(self):
+        entries, self.entries = self.entries, {}
+
+        groups = {}
+        for snapshot, history_type, defer in entries.values():
+            groups.setdefault((snapshot.__class__, history_type, defer), []).append(snapshot)
+
+        for (model, history_type, defer), snapshots in groups.items():
+            if defer:
+                _defer_history_rows(model, snapshots, history_type, self.using)
+            else:
+                write_history_rows(model, snapshots, history_type)
+
+
+def write_history_rows(model, instances, history_type):
+    """ Write the history rows of the instances (their _history_user and _history_date are kept). """
+    get_history_manager_for_model(model).bulk_history_create(
+        instances, batch_size=settings.HISTORY_BATCH_SIZE, update=history_type == '~')
+
+
+def _defer_history_rows(model, instances, history_type, using=None):
+    from .celerytasks import write_deferred_history_rows
+
+    data = serializers.serialize('json', instances)
+    users = [getattr(instance._history_user, 'pk', None) for instance in instances]
+    dates = [instance._history_date.isoformat() for instance in instances]
+    transaction.on_commit(
+        lambda: write_deferred_history_rows.delay(data, history_type, users, dates),
+        using=using)
+
+
+@contextmanager
+def history_buffer(using=None):
+    """
+    Buffer the history rows of the block and write them when it ends (see
+    the top of this module). The block runs in a transaction, a nested
+    block in a savepoint (its rows are dropped if it fails).
+    """
+    parent = _buffer.get()
+    buffer = HistoryBuffer(using)
+    token = _buffer.set(buffer)
+    try:
+        with transaction.atomic(using=using):
+            yield
+            if parent is None:
+                buffer.flush()
+    finally:
+        _buffer.reset(token)
+
+    if parent is not None:
+        parent.merge(buffer)
+
+
+class BufferedHistoricalRecords(HistoricalRecords):
+    """
+    HistoricalRecords writing the history rows in batches inside
+    history_buffer() (see the top of this module). With defer=True the rows
+    are written by a celery task, for models whose history is not critical.
+    """
+
+    def __init__(self, *args, defer=False, **kwargs):
+        self.defer = defer
+        super(BufferedHistoricalRecords, self).__init__(*args, **kwargs)
+
+    def create_historical_record(self, instance, history_type, using=None):
+        buffer = _buffer.get()
+        if buffer is None or not settings.HISTORY_BUFFER_ENABLED or history_type == '-' or self.m2m_fields:
+            return super(BufferedHistoricalRecords, self).create_historical_record(instance, history_type, using=using)
+
+        buffer.add(instance, history_type, self.get_history_user(instance), self.defer)
+
+
+def _history_user():
+    request = getattr(HistoricalRecords.context, 'request', None)
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def bulk_create_with_history(objs, model, batch_size=None, **kwargs):
+    """
+    bulk_create the objects and their history rows (one insert per batch
+    each), with the user of the current request. Models without history
+    are just bulk created.
+    """
+    batch_size = batch_size or settings.HISTORY_BATCH_SIZE
+    try:
+        get_history_manager_for_model(model)
+    except NotHistoricalModelError:
+        created = model.objects.bulk_create(objs, batch_size=batch_size, **kwargs)
+    else:
+        kwargs.setdefault('default_user', _history_user())
+        created = _bulk_create_with_history(objs, model, batch_size=batch_size, **kwargs)
+
+    # bulk_create doesn't send post_save
+    reset_alive_count(model)
+    return created
+
+
+def bulk_update_with_history(objs, model, fields, batch_size=None, **kwargs):
+    """ bulk_update the fields of the objects and create their history rows. """
+    batch_size = batch_size or settings.HISTORY_BATCH_SIZE
+    try:
+        get_history_manager_for_model(model)
+    except NotHistoricalModelError:
+        return model.objects.bulk_update(objs, fields, batch_size=batch_size)
+
+    kwargs.setdefault('default_user', _history_user())
+    return _bulk_update_with_history(objs, model, fields, batch_size=batch_size, **kwargs)
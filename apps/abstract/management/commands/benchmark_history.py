@@ -0,0 +1,74 @@
+from copy import copy
+from time import perf_counter
+import uuid
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.utils import get_history_manager_for_model
+
+from apps.abstract.history import bulk_create_with_history, history_buffer
+
+
+class Command(BaseCommand):
+    help = "Mede a vazão de importação de um model com histórico: save() com histórico síncrono, save() com histórico em lote e bulk_create com histórico."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Model no formato app_label.ModelName (subclasse de AbstractModel com histórico).")
+        parser.add_argument('--count', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+            history_manager = get_history_manager_for_model(model)
+        except (LookupError, ValueError, NotHistoricalModelError) as e:
+            raise CommandError(str(e))
+
+        # the rows are copies of an existing one (only the uuid changes)
+        template = model.all_objects.first()
+        if template is None:
+            raise CommandError("A tabela precisa ter ao menos um registro para servir de modelo.")
+
+        count = options['count']
+
+        def copies():
+            objs = []
+            for _ in range(count):
+                obj = copy(template)
+                obj.pk = obj.id = None
+                obj.uuid = uuid.uuid4()
+                obj._state.adding = True
+                objs.append(obj)
+            return objs
+
+        def save_each(objs):
+            with transaction.atomic():
+                for obj in objs:
+                    obj.save()
+
+        def save_each_buffered(objs):
+            with history_buffer():
+                for obj in objs:
+                    obj.save()
+
+        def bulk(objs):
+            with transaction.atomic():
+                bulk_create_with_history(objs, model)
+
+        modes = (('save', save_each), ('save (buffered)', save_each_buffered), ('bulk_create', bulk))
+        for name, run in modes:
+            objs = copies()
+            start = perf_counter()
+            try:
+                run(objs)
+            except IntegrityError as e:
+                raise CommandError("Não foi possível copiar o registro modelo: %s" % e)
+            elapsed = perf_counter() - start
+            self.stdout.write("%s: %d rows in %.2fs (%.0f rows/s)" % (name, count, elapsed, count / elapsed))
+
+            # remove the benchmark rows and their history
+            uuids = [obj.uuid for obj in objs]
+            history_manager.filter(uuid__in=uuids).delete()
+            model.all_objects.filter(uuid__in=uuids).hard_delete()
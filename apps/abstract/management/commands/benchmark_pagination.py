@@ -0,0 +1,48 @@
+from time import perf_counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+
+class Command(BaseCommand):
+    help = "Compara a latência da paginação por OFFSET e por keyset (created_at, id) em uma página profunda."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Model no formato app_label.ModelName (subclasse de AbstractModel).")
+        parser.add_argument('--page', type=int, default=10000)
+        parser.add_argument('--page-size', type=int, default=9)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+        page, page_size, repeat = options['page'], options['page_size'], options['repeat']
+        queryset = model.objects.order_by('-created_at', '-id')
+        offset = (page - 1) * page_size
+
+        # the keyset query needs the position of the last row of the previous page
+        anchor = queryset.values_list('created_at', 'id')[offset - 1:offset].first() if offset else None
+        if offset and anchor is None:
+            raise CommandError("A tabela não possui registros suficientes para a página %d." % page)
+
+        def offset_query():
+            return list(queryset[offset:offset + page_size])
+
+        def keyset_query():
+            qs = queryset
+            if anchor is not None:
+                created_at, pk = anchor
+                qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+            return list(qs[:page_size])
+
+        for name, query in (('offset', offset_query), ('keyset', keyset_query)):
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                query()
+                timings.append((perf_counter() - start) * 1000)
+            self.stdout.write("%s page=%d: min %.2fms / avg %.2fms" % (name, page, min(timings), sum(timings) / repeat))
@@ -0,0 +1,53 @@
+from time import perf_counter
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.abstract.fields import uuid7
+
+
+class Command(BaseCommand):
+    help = "Mede o tamanho do índice único e a vazão de inserção de uuid em char(32) e binary(16), com uuid4 (aleatório) e uuid7 (ordenado pelo tempo)."
+
+    variants = (
+        ('char32_uuid4', 'char(32)', lambda: uuid.uuid4().hex),
+        ('char32_uuid7', 'char(32)', lambda: uuid7().hex),
+        ('binary16_uuid4', 'binary(16)', lambda: uuid.uuid4().bytes),
+        ('binary16_uuid7', 'binary(16)', lambda: uuid7().bytes),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'mysql':
+            raise CommandError("Este benchmark mede tabelas InnoDB, use um banco MySQL.")
+
+        rows, batch_size = options['rows'], options['batch_size']
+        for name, column_type, generate in self.variants:
+            table = '_benchmark_uuid_%s' % name
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE IF EXISTS %s' % table)
+                cursor.execute(
+                    'CREATE TABLE %s (id bigint AUTO_INCREMENT PRIMARY KEY, uuid %s NOT NULL UNIQUE) ENGINE=InnoDB' % (table, column_type))
+                try:
+                    start = perf_counter()
+                    for offset in range(0, rows, batch_size):
+                        values = [(generate(),) for _ in range(min(batch_size, rows - offset))]
+                        cursor.executemany('INSERT INTO %s (uuid) VALUES (%%s)' % table, values)
+                    elapsed = perf_counter() - start
+
+                    cursor.execute('ANALYZE TABLE %s' % table)
+                    cursor.fetchall()
+                    cursor.execute(
+                        'SELECT data_length, index_length FROM information_schema.TABLES WHERE table_schema = DATABASE() AND table_name = %s', [table])
+                    data_length, index_length = cursor.fetchone()
+                finally:
+                    cursor.execute('DROP TABLE IF EXISTS %s' % table)
+
+            self.stdout.write("%s: %.0f rows/s, data %.1fMB, unique index %.1fMB" % (
+                name, rows / elapsed, data_length / 1024 / 1024, index_length / 1024 / 1024))
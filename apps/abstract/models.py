@@ -1,25 +1,46 @@
-import uuid
+import copy
+from uuid import UUID
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.admin.utils import quote
 from django.db import models
 from django.db.models.query import QuerySet
-from django.urls import reverse
+from django.urls import get_script_prefix, reverse
 from django.utils.text import slugify
 from django.utils import timezone
 
 from tinymce.models import HTMLField
 
+from application.db.routers import get_read_replica
+
+from .counters import incr_alive_count, reset_alive_count
+from .fields import BinaryUUIDField, uuid7
+from .history import bulk_create_with_history, bulk_update_with_history
+
+
+# (model, script prefix) -> the change url of the admin split around the pk
+_admin_url_patterns = {}
+
+_ADMIN_URL_PK = '__pk__'
+
+
+def _original_value(value):
+    # mutable values (json fields) may be changed in place
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
 
 
 class SoftDeletionQuerySet(QuerySet):
     def delete(self):
+        # a bulk soft delete may include already deleted rows, so the alive
+        # counter is rebuilt instead of decremented
+        reset_alive_count(self.model)
         return super(SoftDeletionQuerySet, self).update(
             is_deleted=True,
             deleted_at=timezone.now())
 
     def hard_delete(self):
+        reset_alive_count(self.model)
         return super(SoftDeletionQuerySet, self).delete()
 
     def alive(self):
@@ -28,6 +49,23 @@ class SoftDeletionQuerySet(QuerySet):
     def dead(self):
         return self.exclude(deleted_at=None, is_deleted=False)
 
+    def get_by_uuid(self, value):
+        """ get() by the uuid, an invalid value raises DoesNotExist without querying. """
+        if not isinstance(value, UUID):
+            try:
+                value = UUID(value)
+            except (AttributeError, TypeError, ValueError):
+                raise self.model.DoesNotExist("%s matching query does not exist." % self.model._meta.object_name)
+        return self.get(uuid=value)
+
+    def admin_urls(self):
+        """ {pk: admin change url} of the rows, without loading the instances. """
+        return {pk: self.model.get_admin_url_for_pk(pk) for pk in self.values_list('pk', flat=True)}
+
+    def replica(self):
+        """ Read from a replica (reports, exports), see application.db.routers. """
+        return self.using(get_read_replica())
+
 
 class SoftDeletionManager(models.Manager):
     def __init__(self, *args, **kwargs):
@@ -41,10 +79,19 @@ class SoftDeletionManager(models.Manager):
     def hard_delete(self):
         return self.get_queryset().hard_delete()
 
+    def get_by_uuid(self, value):
+        return self.get_queryset().get_by_uuid(value)
+
+    def bulk_create_with_history(self, objs, batch_size=None, **kwargs):
+        return bulk_create_with_history(objs, self.model, batch_size=batch_size, **kwargs)
+
+    def bulk_update_with_history(self, objs, fields, batch_size=None, **kwargs):
+        return bulk_update_with_history(objs, self.model, fields, batch_size=batch_size, **kwargs)
+
 
 class AbstractModel(models.Model):
-    uuid = models.UUIDField(
-        default=uuid.uuid4,
+    uuid = BinaryUUIDField(
+        default=uuid7,
         unique=True,
         editable=False)
     obs = models.TextField(
@@ -88,16 +135,89 @@ class AbstractModel(models.Model):
         abstract = True
         ordering = ['-created_at']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(AbstractModel, cls).from_db(db, field_names, values)
+        # the original values of the loaded fields, to save only the changed ones
+        instance._loaded_values = {
+            name: _original_value(value) for name, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
+
+    def get_dirty_fields(self):
+        """ Names of the loaded fields changed since the instance was read from the database. """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return None
+
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in loaded_values and getattr(self, field.attname) != loaded_values[field.attname]
+        ]
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """
+        An instance read from the database only writes the changed fields
+        (plus updated_at), and isn't written at all when nothing changed.
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        is_update = not self._state.adding and not force_insert and loaded_values is not None and loaded_values.get(self._meta.pk.attname) == self.pk
+
+        if is_update:
+            if update_fields is None:
+                update_fields = self.get_dirty_fields()
+            if not update_fields:
+                return
+            self.updated_at = timezone.now()
+            update_fields = set(update_fields) | {'updated_at'}
+
+        super(AbstractModel, self).save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+
+        if is_update:
+            for name in update_fields:
+                field = self._meta.get_field(name)
+                loaded_values[field.attname] = _original_value(getattr(self, field.attname))
+        else:
+            self._loaded_values = {field.attname: _original_value(getattr(self, field.attname)) for field in self._meta.concrete_fields}
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super(AbstractModel, self).refresh_from_db(using=using, fields=fields, **kwargs)
+
+        # the reloaded fields are clean again
+        if getattr(self, '_loaded_values', None) is None:
+            self._loaded_values = {}
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                self._loaded_values[field.attname] = _original_value(getattr(self, field.attname))
+
     def delete(self, using=None, keep_parents=False):
         """ soft delete a model instance """
         """ we never delete a object! Instead we mark he as deleted. """
+        was_alive = not self.is_deleted
         self.deleted_at = timezone.now()
         self.is_deleted = True
-        self.save()
+        self.save(update_fields=['deleted_at', 'is_deleted'])
+        if was_alive:
+            incr_alive_count(self.__class__, -1)
 
     def hard_delete(self):
+        reset_alive_count(self.__class__)
         super(AbstractModel, self).delete()
 
+    @classmethod
+    def get_admin_url_for_pk(cls, pk):
+        """ The admin change url of the pk, reversed once per model (then only formatted). """
+        key = (cls, get_script_prefix())
+        pattern = _admin_url_patterns.get(key)
+        if pattern is None:
+            # the admin registers the concrete model (as the ContentType of a proxy)
+            opts = cls._meta.concrete_model._meta
+            url = reverse("admin:%s_%s_change" % (opts.app_label, opts.model_name), args=(_ADMIN_URL_PK,))
+            pattern = _admin_url_patterns[key] = url.split(_ADMIN_URL_PK, 1)
+        return pattern[0] + quote(str(pk)) + pattern[1]
+
     def get_admin_url(self):
-        content_type = ContentType.objects.get_for_model(self.__class__)
-        return reverse("admin:%s_%s_change" % (content_type.app_label, content_type.model), args=(self.id,))
+        return self.get_admin_url_for_pk(self.id)
@@ -0,0 +1,221 @@
+from base64 import b64decode, b64encode
+import binascii
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .counters import get_alive_count
+
+
+def _is_alive_only_queryset(queryset) -> bool:
+    """
+    Check if the queryset is the plain SoftDeletionManager queryset, that is,
+    without any filter other than is_deleted=False (admin search, list_filter
+    and api filters always fall back to the exact count).
+    """
+    query = queryset.query
+    if query.distinct or query.group_by is not None or query.combinator:
+        return False
+    if query.low_mark or query.high_mark is not None:
+        return False
+
+    manager = getattr(queryset.model, 'objects', None)
+    if manager is None or not getattr(manager, 'alive_only', False):
+        return False
+
+    return query.where == manager.all().query.where
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that reads the number of objects from the cached alive counter
+    (see apps.abstract.counters) when paginating an unfiltered AbstractModel
+    queryset, so listing pages of large tables doesn't scan the is_deleted
+    index on every request.
+    """
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if hasattr(object_list, 'query') and _is_alive_only_queryset(object_list):
+            return get_alive_count(object_list.model, object_list.db)
+        return super().count
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    django_paginator_class = ApproximateCountPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the (created_at, id) pair, the same order of
+    AbstractModel.Meta.ordering with the primary key as tie breaker. Each page
+    is read with an indexed range filter instead of an OFFSET, so the latency
+    doesn't grow with the page depth, and rows inserted while a client is
+    paging never shift the following pages.
+
+    The cursors are opaque to the clients (urlsafe base64) and the client may
+    choose the page size through the page_size query param, limited by
+    API_MAX_PAGE_SIZE.
+
+    The models without a created_at field are paged by number
+    (ApproximateCountPagination), so it can be the default pagination class.
+    """
+    ordering = ('-created_at', '-pk')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+        self.fallback = None
+
+    @staticmethod
+    def supports_model(model) -> bool:
+        return any(field.name == 'created_at' for field in model._meta.concrete_fields)
+
+    def _view_model(self, view):
+        queryset = getattr(view, 'queryset', None)
+        return queryset.model if queryset is not None else None
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def encode_cursor(self, position, reverse):
+        created_at, pk = position
+        data = '%s|%s|%d' % (created_at.isoformat(), pk, int(reverse))
+        encoded = b64encode(data.encode('ascii'), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = b64decode(encoded.encode('ascii'), altchars=b'-_', validate=True).decode('ascii')
+            created_at, pk, reverse = data.split('|')
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError(data)
+            return (created_at, int(pk)), bool(int(reverse))
+        except (TypeError, ValueError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.supports_model(queryset.model):
+            self.fallback = ApproximateCountPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+        self.fallback = None
+
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        position, reverse = cursor if cursor is not None else (None, False)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'pk')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+        # read one extra row to know if there is a following page
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results:
+            first, last = results[0], results[-1]
+            if has_more or reverse:
+                self.next_position = (last.created_at, last.pk)
+            if (has_more and reverse) or (position is not None and not reverse):
+                self.previous_position = (first.created_at, first.pk)
+        elif position is not None:
+            # an empty page (past the end or the start): link back to it
+            if reverse:
+                self.next_position = position
+            else:
+                self.previous_position = position
+
+        return results
+
+    def get_next_link(self):
+        if self.fallback is not None:
+            return self.fallback.get_next_link()
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, False)
+
+    def get_previous_link(self):
+        if self.fallback is not None:
+            return self.fallback.get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        model = self._view_model(view)
+        if model is not None and not self.supports_model(model):
+            return ApproximateCountPagination().get_schema_operation_parameters(view)
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor da página.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Quantidade de itens por página (máximo %d).' % self.max_page_size,
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,3 +1,227 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core import serializers
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.grievance.models import Grievance
+from apps.project.models import Project
+
+from .celerytasks import write_deferred_history_rows
+from .history import history_buffer
+from .pagination import KeysetPagination
+
+
+factory = APIRequestFactory()
+
+
+def paginate(queryset, url='/projects/'):
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(queryset, Request(factory.get(url)))
+    return paginator, page
+
+
+def cursor_of(link):
+    return link.split('?', 1)[1]
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # two rows share each created_at, the pk breaks the tie
+        cls.projects = [
+            Project.objects.create(name="Projeto %d" % i, code="P%d" % i, created_at=now - timedelta(minutes=i // 2))
+            for i in range(7)
+        ]
+        # newest first, the highest pk first among equal created_at
+        cls.ordered = sorted(cls.projects, key=lambda p: (p.created_at, p.pk), reverse=True)
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        paginator.base_url = 'http://testserver/projects/'
+        position = (self.projects[3].created_at, self.projects[3].pk)
+
+        link = paginator.encode_cursor(position, True)
+        request = Request(factory.get('/projects/?' + cursor_of(link)))
+        self.assertEqual(paginator.decode_cursor(request), (position, True))
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'dGVzdA=='):
+            with self.assertRaises(NotFound):
+                paginate(Project.objects.all(), '/projects/?cursor=%s' % cursor)
+
+    def test_forward_pages(self):
+        paginator, page = paginate(Project.objects.all(), '/projects/?page_size=3')
+        self.assertEqual(page, self.ordered[:3])
+        self.assertIsNone(paginator.get_previous_link())
+
+        seen = list(page)
+        while paginator.get_next_link():
+            paginator, page = paginate(Project.objects.all(), '/projects/?' + cursor_of(paginator.get_next_link()))
+            seen += page
+        self.assertEqual(seen, self.ordered)
+
+    def test_reverse_pages(self):
+        paginator, page = paginate(Project.objects.all(), '/projects/?page_size=3')
+        paginator, page = paginate(Project.objects.all(), '/projects/?' + cursor_of(paginator.get_next_link()))
+        self.assertEqual(page, self.ordered[3:6])
+
+        paginator, page = paginate(Project.objects.all(), '/projects/?' + cursor_of(paginator.get_previous_link()))
+        self.assertEqual(page, self.ordered[:3])
+        self.assertIsNone(paginator.get_previous_link())
+        self.assertIsNotNone(paginator.get_next_link())
+
+    def test_rows_inserted_while_paging(self):
+        paginator, page = paginate(Project.objects.all(), '/projects/?page_size=3')
+        Project.objects.create(name="Novo", code="NOVO")
+
+        paginator, page = paginate(Project.objects.all(), '/projects/?' + cursor_of(paginator.get_next_link()))
+        self.assertEqual(page, self.ordered[3:6])
+
+    def test_model_without_created_at(self):
+        Group.objects.bulk_create([Group(name="Grupo %d" % i) for i in range(12)])
+
+        paginator, page = paginate(Group.objects.order_by('name'), '/groups/')
+        self.assertIsNotNone(paginator.fallback)
+        self.assertEqual(len(page), 9)
+        self.assertEqual(paginator.get_paginated_response([]).data['count'], 12)
+
+
+class DirtyFieldsTests(TestCase):
+
+    def setUp(self):
+        Project.objects.create(name="Projeto", code="P1")
+        self.project = Project.objects.get(code="P1")
+
+    def test_saves_only_the_changed_fields(self):
+        self.project.name = "Outro nome"
+        self.assertEqual(self.project.get_dirty_fields(), ['name'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.project.save()
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertIn(connection.ops.quote_name('name'), sql)
+        self.assertIn(connection.ops.quote_name('updated_at'), sql)
+        self.assertNotIn(connection.ops.quote_name('code'), sql)
+
+        self.assertEqual(Project.objects.get(code="P1").name, "Outro nome")
+        self.assertEqual(self.project.get_dirty_fields(), [])
+
+    def test_clean_instance_is_not_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.project.save()
+        self.assertEqual(len(queries), 0)
+
+    def test_refresh_from_db_is_clean(self):
+        Project.objects.filter(pk=self.project.pk).update(name="Alterado")
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.get_dirty_fields(), [])
+
+        # the reloaded value is the original one: setting it back is a change
+        self.project.name = "Projeto"
+        self.assertEqual(self.project.get_dirty_fields(), ['name'])
+
+    def test_refresh_of_some_fields(self):
+        self.project.name = "Local"
+        self.project.code = "P2"
+        self.project.refresh_from_db(fields=['code'])
+        self.assertEqual(self.project.get_dirty_fields(), ['name'])
+
+    def test_soft_delete_updates_only_the_deletion_fields(self):
+        self.project.name = "Não salvo"
+        with CaptureQueriesContext(connection) as queries:
+            self.project.delete()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn(connection.ops.quote_name('name'), queries[0]['sql'])
+
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        deleted = Project.all_objects.get(pk=self.project.pk)
+        self.assertTrue(deleted.is_deleted)
+        self.assertIsNotNone(deleted.deleted_at)
+        self.assertEqual(deleted.name, "Projeto")
+
+    def test_soft_delete_of_a_new_instance(self):
+        project = Project.objects.create(name="Novo", code="P3")
+        project.delete()
+        self.assertTrue(Project.all_objects.get(pk=project.pk).is_deleted)
+
+
+class HistoryBufferTests(TestCase):
+
+    def create(self, external_id='1'):
+        return Grievance.objects.create(external_id=external_id, code='A90', notified_at=date(2024, 3, 6), patient_name="Maria da Silva")
+
+    def history_inserts(self, queries):
+        table = connection.ops.quote_name(Grievance.history.model._meta.db_table)
+        return [query for query in queries if query['sql'].startswith('INSERT INTO %s' % table)]
+
+    def test_saved_right_away_outside_the_buffer(self):
+        grievance = self.create()
+        grievance.code = 'A91'
+        grievance.save()
+        self.assertEqual(list(grievance.history.values_list('history_type', flat=True)), ['~', '+'])
+
+    def test_rows_are_written_together_at_the_end(self):
+        with CaptureQueriesContext(connection) as queries:
+            with history_buffer():
+                first = self.create('1')
+                second = self.create('2')
+                first.code = 'A91'
+                first.save()
+                self.assertFalse(Grievance.history.exists())
+        self.assertEqual(len(self.history_inserts(queries)), 1)
+
+        # a creation followed by a change is a single row with the last state
+        self.assertEqual([(row.history_type, row.code) for row in first.history.all()], [('+', 'A91')])
+        self.assertEqual([(row.history_type, row.code) for row in second.history.all()], [('+', 'A90')])
+
+        with history_buffer():
+            first.code = 'A92'
+            first.save()
+            first.code = 'A93'
+            first.save()
+        self.assertEqual([(row.history_type, row.code) for row in first.history.all()], [('~', 'A93'), ('+', 'A91')])
+
+    def test_rows_are_dropped_with_the_transaction(self):
+        with self.assertRaises(ValueError):
+            with history_buffer():
+                self.create('1')
+                raise ValueError
+        self.assertFalse(Grievance.all_objects.exists())
+        self.assertFalse(Grievance.history.exists())
+
+    def test_failed_nested_buffer_drops_its_rows(self):
+        with history_buffer():
+            self.create('1')
+            try:
+                with history_buffer():
+                    self.create('2')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(list(Grievance.history.values_list('external_id', flat=True)), ['1'])
+
+    @override_settings(HISTORY_BUFFER_ENABLED=False)
+    def test_disabled(self):
+        with history_buffer():
+            self.create()
+            self.assertEqual(Grievance.history.count(), 1)
+
+    def test_deferred_rows(self):
+        user = get_user_model().objects.create(username='maria')
+        grievance = self.create()
+        Grievance.history.all().delete()
+
+        write_deferred_history_rows(serializers.serialize('json', [grievance]), '~', [user.pk], ['2024-03-06T10:00:00+00:00'])
+        row = grievance.history.get()
+        self.assertEqual((row.history_type, row.history_user, row.history_date.year), ('~', user, 2024))
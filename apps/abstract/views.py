@@ -1,3 +1,12 @@
-from django.shortcuts import render
+from application.db.routers import read_from_replica
 
-# Create your views here.
+
+class ReplicaListMixin:
+    """
+    Mixin for the api viewsets of AbstractModel subclasses: the list action
+    reads from a replica (see application.db.routers).
+    """
+
+    def list(self, request, *args, **kwargs):
+        with read_from_replica():
+            return super().list(request, *args, **kwargs)
@@ -1,7 +1,27 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+from django.db.models.signals import post_delete, post_save
 
 
 class ConfigConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.config'
     verbose_name = 'Configurações'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+
+        from .authentication import bump_user_auth_version
+        from .models import Setting
+        from .utils import clear_settings_cache
+
+        post_save.connect(clear_settings_cache, sender=Setting, dispatch_uid='clear_settings_cache_on_save')
+        post_delete.connect(clear_settings_cache, sender=Setting, dispatch_uid='clear_settings_cache_on_delete')
+
+        # invalidate the cached jwt authentications of the user
+        User = get_user_model()
+        post_save.connect(bump_user_auth_version, sender=User, dispatch_uid='bump_user_auth_version_on_save')
+        post_delete.connect(bump_user_auth_version, sender=User, dispatch_uid='bump_user_auth_version_on_delete')
+
+        # the cached admin dashboard widgets (application.dashboard)
+        autodiscover_modules('dashboard')
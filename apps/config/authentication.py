@@ -0,0 +1,133 @@
+from datetime import timedelta
+import hashlib
+from time import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+TOKEN_KEY = 'jwt:token:%s'
+USER_VERSION_KEY = 'jwt:user-version:%s'
+BLACKLIST_KEY = 'jwt:blacklist:%s'
+
+
+def get_user_auth_version(user_id) -> str:
+    """
+    The version of the credentials of the user, changed on every save of the
+    User row (deactivation, password change...). A missing version (evicted
+    from the cache) is replaced by a new one, which invalidates every cached
+    token of the user instead of accepting a stale one.
+    """
+    key = USER_VERSION_KEY % user_id
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_auth_version(sender, instance, update_fields=None, **kwargs):
+    # the last_login update of a login (the admin, update_last_login) keeps the tokens
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    cache.set(USER_VERSION_KEY % instance.pk, uuid4().hex, None)
+
+
+def blacklist_token(token):
+    ttl = int(token.payload.get('exp', 0) - time())
+    if ttl > 0:
+        cache.set(BLACKLIST_KEY % token[jwt_settings.JTI_CLAIM], 1, ttl)
+
+
+def is_blacklisted(payload) -> bool:
+    jti = payload.get(jwt_settings.JTI_CLAIM)
+    return jti is not None and cache.get(BLACKLIST_KEY % jti) is not None
+
+
+def touch_last_login(user):
+    """ Write last_login at most once per LAST_LOGIN_UPDATE_INTERVAL (a single conditional UPDATE). """
+    now = timezone.now()
+    stale = Q(last_login__isnull=True) | Q(last_login__lt=now - timedelta(seconds=settings.LAST_LOGIN_UPDATE_INTERVAL))
+    # update() doesn't send post_save, the cached tokens stay valid
+    if get_user_model().objects.filter(stale, pk=user.pk).update(last_login=now):
+        user.last_login = now
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that caches the verified token and its user for the
+    remaining lifetime of the token, so an authenticated request doesn't
+    verify the signature nor query the User table again. The cached entry
+    is discarded when the user auth version changes (any save of the user
+    but the last_login update) and the token jti is checked against the
+    cache blacklist.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        key = TOKEN_KEY % hashlib.sha256(raw_token).hexdigest()
+        cached = cache.get(key)
+        if cached is not None:
+            user, validated_token, version = cached
+            if version == get_user_auth_version(user.pk) and not is_blacklisted(validated_token.payload):
+                return user, validated_token
+
+        validated_token = self.get_validated_token(raw_token)
+        if is_blacklisted(validated_token.payload):
+            raise InvalidToken("O token foi revogado.")
+
+        user_id = validated_token.payload.get(jwt_settings.USER_ID_CLAIM)
+        version = get_user_auth_version(user_id)
+        user = self.get_user(validated_token)
+
+        ttl = int(validated_token.payload.get('exp', 0) - time())
+        if ttl > 0:
+            cache.set(key, (user, validated_token, version), ttl)
+
+        return user, validated_token
+
+
+class CoalescedLastLoginTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """ Token obtain with last_login coalesced by touch_last_login (UPDATE_LAST_LOGIN off). """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        touch_last_login(self.user)
+        return data
+
+
+class CachedBlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that rejects a rotated token from the cache blacklist before
+    touching the database. The token_blacklist tables (BLACKLIST_AFTER_ROTATION)
+    are still checked and written by TokenRefreshSerializer, so a revocation
+    survives an eviction or a restart of the cache.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_blacklisted(refresh.payload):
+            raise InvalidToken("O token foi revogado.")
+
+        data = super().validate(attrs)
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            blacklist_token(refresh)
+
+        return data
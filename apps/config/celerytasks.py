@@ -0,0 +1,63 @@
+import logging
+import sys
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.db.models.functions import Lower
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from application.celery import app
+
+
+logger = logging.getLogger('apps.config.celerytasks')
+
+
+@app.task(ignore_result=True)
+def send_password_reset_email(email: str):
+    """
+    Send the password reset email, if there is an active user with the email.
+    Called by the password_reset view, which always answers the same message
+    (the response never tells if the account exists).
+    """
+    from apps.utils.utils import default_render_template_email, get_current_site_url
+
+    try:
+        # Aqui os apps de notificação são carregados sob demanda
+        from notification.utils import create_email
+        from notification.utils import notify_error
+    except ImportError:
+        logger.error("Email de nova senha não enviado, o app de notificação não está disponível.")
+        return
+
+    # uses the functional index on LOWER(email) (config migration 0002, MySQL)
+    user = User.objects.annotate(email_lower=Lower('email')).filter(email_lower=email.lower(), is_active=True).first()
+    if user is None:
+        return
+
+    try:
+        subject = "Solicitação de redefinição de senha"
+        token = default_token_generator.make_token(user)
+        email_template_name = settings.BASE_DIR + '/templates/email/password_reset_email'
+
+        url_admin = get_current_site_url().replace("/admin", "").rstrip("/")
+
+        email_link = "{}/accounts/password-reset-confirm/{}/{}".format(url_admin, urlsafe_base64_encode(force_bytes(user.id)), token)
+        email_args = {
+            'email': user.email,
+            'site_name': settings.SITE_NAME,
+            'user': user,
+            'email_link': email_link,
+        }
+
+        email_content, _ = default_render_template_email(email_template_name, email_args)
+
+        internal_subject = "Pedido para criar nova senha"
+        result = create_email(user.email, subject, email_content, internal_subject, "user.id:{}-uuid:{}".format(user.id, uuid4()))
+        if result is None:
+            raise Exception("Erro crítico! Objeto notification.Email não pode ser criado!")
+    except Exception as e:
+        _, _, exc_tb = sys.exc_info()
+        notify_error(__file__, exc_tb.tb_lineno, e)
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# The code run in a new interpreter to measure each cold start
+STARTUP_TARGETS = {
+    'wsgi': "import application.wsgi",
+    'celery': (
+        "import django; django.setup(); "
+        "from application.celery import app; app.loader.import_default_modules()"
+    ),
+}
+
+
+def parse_importtime(output: str):
+    """ The (depth, module, cumulative us) entries of a -X importtime output. """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative)))
+    return entries
+
+
+def app_import_time(entries, package: str) -> int:
+    """
+    Sum the cumulative import time of every import rooted in the package,
+    not counting the nested imports of the package itself twice.
+    """
+    # -X importtime prints the children before the parent, so the entries
+    # are walked backwards to visit each parent before its children
+    total = 0
+    ancestors = []
+    for depth, name, cumulative in reversed(entries):
+        del ancestors[depth:]
+        matches = name == package or name.startswith(package + '.')
+        if matches and not any(ancestors):
+            total += cumulative
+        ancestors.append(matches)
+    return total
+
+
+def app_package(entry: str) -> str:
+    # 'django_cleanup.apps.CleanupConfig' -> 'django_cleanup'
+    parts = entry.split('.')
+    if len(parts) > 1 and parts[-1][:1].isupper():
+        parts = parts[:-2] if parts[-2] == 'apps' else parts[:-1]
+    return '.'.join(parts)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo de inicialização a frio (wsgi e worker celery) e o tempo de import por módulo "
+        "e por app do INSTALLED_APPS. Com --check falha se o tempo exceder o orçamento (uso no CI)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=STARTUP_TARGETS.keys(), nargs='+', default=list(STARTUP_TARGETS.keys()))
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--check', action='store_true', help="Falha se algum alvo exceder o orçamento definido em STARTUP_BUDGET_MS.")
+
+    def run_target(self, code):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'application.settings')
+        start = perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        elapsed = (perf_counter() - start) * 1000
+
+        if result.returncode != 0:
+            raise CommandError(result.stderr[-2000:])
+        return elapsed, parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        exceeded = []
+
+        for target in options['target']:
+            runs = [self.run_target(STARTUP_TARGETS[target]) for _ in range(options['repeat'])]
+            elapsed, entries = min(runs, key=lambda r: r[0])
+
+            self.stdout.write(self.style.MIGRATE_HEADING("%s: %.0fms (melhor de %d)" % (target, elapsed, options['repeat'])))
+
+            self.stdout.write("  módulos (cumulativo):")
+            top_level = sorted((e for e in entries if e[0] == 0), key=lambda e: e[2], reverse=True)
+            for _, name, cumulative in top_level[:options['top']]:
+                self.stdout.write("    %8.1fms  %s" % (cumulative / 1000, name))
+
+            self.stdout.write("  INSTALLED_APPS:")
+            apps_time = [(app_import_time(entries, app_package(entry)), entry) for entry in settings.INSTALLED_APPS]
+            for cumulative, entry in sorted(apps_time, reverse=True):
+                self.stdout.write("    %8.1fms  %s" % (cumulative / 1000, entry))
+
+            budget = settings.STARTUP_BUDGET_MS.get(target)
+            if budget is not None and elapsed > budget:
+                exceeded.append("%s: %.0fms > %dms" % (target, elapsed, budget))
+
+        if options['check'] and exceeded:
+            raise CommandError("Orçamento de inicialização excedido: %s" % ", ".join(exceeded))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Setting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='O nome ou chave que identifica a informação.', max_length=255, unique=True, verbose_name='Nome da propriedade')),
+                ('value', models.TextField(blank=True, help_text='A informação referente a chave (name). O dado propriamente dito.', null=True, verbose_name='Valor')),
+                ('enabled', models.BooleanField(default=True, help_text='Marque/Desmarque para habilitar essa variável no sistema.', verbose_name='Habilitado')),
+                ('obs', models.TextField(blank=True, help_text='Observações de uso interno, não visível para os clientes.', max_length=500, null=True, verbose_name='Observações')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Data de criação')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Data da última atualização')),
+            ],
+            options={
+                'verbose_name': 'Configurações Internas',
+                'verbose_name_plural': 'Configurações Internas',
+                'db_table': 'config_settings',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("CREATE INDEX auth_user_email_lower_idx ON auth_user ((LOWER(email)))")
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("DROP INDEX auth_user_email_lower_idx ON auth_user")
+
+
+class Migration(migrations.Migration):
+    """
+    Functional index on LOWER(auth_user.email), used by the case insensitive
+    lookup of the password reset (config.celerytasks.send_password_reset_email).
+    Only created on MySQL (8.0.13+), the other databases are used by the tests.
+    """
+
+    dependencies = [
+        ('config', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,3 +1,120 @@
-from django.test import TestCase
+from datetime import timedelta
+from importlib.util import find_spec
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .authentication import get_user_auth_version
+from .management.commands.startup_report import app_import_time, app_package, parse_importtime
+
+
+class TokenRefreshTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('usuario', 'usuario@example.com', 'senha-forte-123')
+        self.client = APIClient()
+
+    def obtain(self):
+        response = self.client.post('/token/', {'username': 'usuario', 'password': 'senha-forte-123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def refresh(self, token):
+        return self.client.post('/token/refresh/', {'refresh': token}, format='json')
+
+    def test_rotated_token_is_revoked(self):
+        tokens = self.obtain()
+        response = self.refresh(tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    def test_revocation_survives_the_cache(self):
+        tokens = self.obtain()
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 200)
+
+        cache.clear()
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_login_keeps_the_cached_authentications(self):
+        user = User.objects.get(username='usuario')
+        version = get_user_auth_version(user.pk)
+
+        self.obtain()
+        self.assertEqual(get_user_auth_version(user.pk), version)
+
+        user.is_active = False
+        user.save()
+        self.assertNotEqual(get_user_auth_version(user.pk), version)
+
+    def test_last_login_is_written_once_per_interval(self):
+        def last_login_updates(queries):
+            return [query for query in queries if query['sql'].startswith('UPDATE') and 'last_login' in query['sql']]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.obtain()
+        self.assertEqual(len(last_login_updates(queries)), 1)
+        last_login = User.objects.get(username='usuario').last_login
+        self.assertIsNotNone(last_login)
+
+        # inside the interval the conditional UPDATE matches no row
+        self.obtain()
+        self.assertEqual(User.objects.get(username='usuario').last_login, last_login)
+
+        User.objects.filter(username='usuario').update(last_login=last_login - timedelta(hours=2))
+        self.obtain()
+        self.assertGreater(User.objects.get(username='usuario').last_login, last_login)
+
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   rest_framework.settings
+import time:        50 |         50 |     apps.utils.utils
+import time:       200 |        250 |   apps.config.views
+import time:       300 |        650 | apps.config
+import time:       400 |        400 | django_cleanup
+Some other line
+"""
+
+
+class StartupReportTests(SimpleTestCase):
+
+    def test_parse_importtime(self):
+        self.assertEqual(parse_importtime(IMPORTTIME_OUTPUT), [
+            (1, 'rest_framework.settings', 100),
+            (2, 'apps.utils.utils', 50),
+            (1, 'apps.config.views', 250),
+            (0, 'apps.config', 650),
+            (0, 'django_cleanup', 400),
+        ])
+
+    def test_app_import_time(self):
+        entries = parse_importtime(IMPORTTIME_OUTPUT)
+        # the nested imports of the package are counted once
+        self.assertEqual(app_import_time(entries, 'apps.config'), 650)
+        self.assertEqual(app_import_time(entries, 'apps.utils'), 50)
+        self.assertEqual(app_import_time(entries, 'rest_framework'), 100)
+        self.assertEqual(app_import_time(entries, 'apps.project'), 0)
+
+    def test_app_package(self):
+        self.assertEqual(app_package('django_cleanup.apps.CleanupConfig'), 'django_cleanup')
+        self.assertEqual(app_package('apps.config.apps.ConfigConfig'), 'apps.config')
+        self.assertEqual(app_package('rest_framework'), 'rest_framework')
+
+    def test_wsgi_cold_start_within_budget(self):
+        # the same check as `manage.py startup_report --check` in the CI
+        call_command('startup_report', '--check', '--target', 'wsgi', '--repeat', '1', stdout=StringIO())
+
+    # the worker imports the tasks of the notification package (application.celery)
+    @skipUnless(find_spec('notification'), "notification não instalado")
+    def test_celery_cold_start_within_budget(self):
+        call_command('startup_report', '--check', '--target', 'celery', '--repeat', '1', stdout=StringIO())
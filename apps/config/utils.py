@@ -0,0 +1,42 @@
+from time import monotonic
+
+from django.conf import settings
+
+
+# Process level cache of the config.Setting rows. The table is small and read
+# on almost every request (feature flags), so it's loaded at once and kept for
+# SETTING_CACHE_TIMEOUT seconds, or until a Setting is saved or deleted.
+
+_settings_cache = {}
+_settings_loaded_at = None
+
+
+def load_settings():
+    from .models import Setting
+
+    global _settings_cache, _settings_loaded_at
+    _settings_cache = {s.name: s for s in Setting.objects.all()}
+    _settings_loaded_at = monotonic()
+    return _settings_cache
+
+
+def clear_settings_cache(**kwargs):
+    global _settings_loaded_at
+    _settings_loaded_at = None
+
+
+def get_setting(name: str):
+    """
+    Return the Setting with the given name. When the setting doesn't exist an
+    unsaved Setting with enabled=None is returned.
+    """
+    from .models import Setting
+
+    cache = _settings_cache
+    if _settings_loaded_at is None or monotonic() - _settings_loaded_at > settings.SETTING_CACHE_TIMEOUT:
+        cache = load_settings()
+
+    setting = cache.get(name)
+    if setting is None:
+        return Setting(name=name, enabled=None)
+    return setting
@@ -1,25 +1,32 @@
+from functools import lru_cache
+import hashlib
 import markdown
 import sys
-from uuid import uuid4
+
+from asgiref.sync import sync_to_async
 
 from django.conf import settings
-from django.contrib.auth import authenticate, login, logout
+from django.core.cache import cache
+from django.contrib.auth import login, logout
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.forms import PasswordResetForm
-from django.contrib.auth.models import User
-from django.contrib.auth.tokens import default_token_generator
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import redirect
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import force_bytes
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
 # from config.models import Site
 # from notification.utils import create_email
 # from notification.utils import notify_error
 
-from apps.utils.utils import default_render_template_email, html_response
+from application.db.mysql_pool.pool import pool_stats
+from apps.utils.async_utils import acan_call_celery, aconsulta_cep, closes_http_client
+from apps.utils.utils import get_client_ip, html_response, log_message
+
+from .celerytasks import send_password_reset_email
 
 
 # HTTP Error 400
@@ -46,9 +53,45 @@ def home(request):
     return redirect('/admin/')
 
 
+@lru_cache(maxsize=None)
+def _robots_txt():
+	content = render_to_string("robots.txt")
+	return content, hashlib.md5(content.encode()).hexdigest()
+
+
+@cache_control(public=True, max_age=settings.ASSETS_CACHE_MAX_AGE)
+@condition(etag_func=lambda request: _robots_txt()[1])
+def robots_txt(request):
+	return HttpResponse(_robots_txt()[0], content_type="text/plain")
+
+
+def _login_throttle_keys(request, username):
+	return [
+		'login-failures:ip:%s' % get_client_ip(request),
+		'login-failures:user:%s' % hashlib.sha256(username.lower().encode()).hexdigest(),
+	]
+
+
+def _is_login_locked(keys):
+	failures = cache.get_many(keys)
+	return failures.get(keys[0], 0) >= settings.LOGIN_MAX_FAILURES_PER_IP or failures.get(keys[1], 0) >= settings.LOGIN_MAX_FAILURES_PER_USER
+
+
+def _register_login_failure(keys):
+	for key in keys:
+		cache.add(key, 0, settings.LOGIN_LOCKOUT_WINDOW)
+		try:
+			cache.incr(key)
+		except ValueError:
+			pass
+
+
 def login_view(request):
-	logout(request)
-	username = password = ''
+	# only an authenticated session needs to be flushed, an anonymous
+	# visitor doesn't cost a session write
+	if request.user.is_authenticated:
+		logout(request)
+
 	has_next = request.GET["next"] if "next" in request.GET else ""
 
 	action_url = request.path_info
@@ -64,22 +107,30 @@ def login_view(request):
 	}
 
 	if request.POST:
+		throttle_keys = _login_throttle_keys(request, request.POST.get('username', ''))
+
+		if _is_login_locked(throttle_keys):
+			# the password isn't even checked while locked (a bound form would
+			# authenticate when the template renders its errors)
+			context['form'] = AuthenticationForm(request)
+			context['post_msg'] = 'Muitas tentativas de login. Por favor, aguarde alguns minutos e tente novamente.'
+			return html_response(request, '/accounts/login.html', 200, context)
+
 		form = AuthenticationForm(request, data=request.POST)
 		context['form'] = form
 
 		if form.is_valid():
-			username = request.POST['username']
-			password = request.POST['password']
-			user = authenticate(username=username, password=password)
-
-			if user is not None:
-				if user.is_active and user.is_staff:
-					login(request, user)
-					return HttpResponseRedirect('/admin/' if len(has_next) == 0 else has_next)
-				elif not user.is_active and user.is_staff:
-					context['post_msg'] = 'Por favor, ative a sua conta. Para maiores informações entre em contato com o Administrador.'
-				elif not user.is_staff:
-					context['post_msg'] = 'O usuário ainda não é um membro da equipe. Entre em contato com o Administrador.'
+			# the form already authenticated the user (one password hash check)
+			user = form.get_user()
+			cache.delete(throttle_keys[1])
+
+			if user.is_staff:
+				login(request, user)
+				return HttpResponseRedirect('/admin/' if len(has_next) == 0 else has_next)
+			else:
+				context['post_msg'] = 'O usuário ainda não é um membro da equipe. Entre em contato com o Administrador.'
+		else:
+			_register_login_failure(throttle_keys)
 	else:
 		form = AuthenticationForm(request)
 		context['form'] = form
@@ -87,6 +138,15 @@ def login_view(request):
 	return html_response(request, '/accounts/login.html', 200, context)
 
 
+def _is_rate_limited(key, limit, window):
+	# fixed window counter in the cache
+	cache.add(key, 0, window)
+	try:
+		return cache.incr(key) > limit
+	except ValueError:
+		return False
+
+
 def password_reset(request):
 	context = {
 		'assets_url': settings.MEDIA_URL,
@@ -102,47 +162,24 @@ def password_reset(request):
 
 		if form.is_valid():
 			email = form.cleaned_data['email'].lower()
+			ip = get_client_ip(request)
+			window = settings.PASSWORD_RESET_RATE_WINDOW
 
-			try:
-				user = User.objects.get(email__iexact=email)
-				subject = "Solicitação de redefinição de senha"
-				token = default_token_generator.make_token(user)
-				email_template_name = settings.BASE_DIR + '/templates/email/password_reset_email'
-
-				url_admin = site.url_admin.replace("/admin", "")
-				if url_admin[-1] == "/":
-					url_admin = url_admin[0:-1]
-
-				email_link = "{}/accounts/password-reset-confirm/{}/{}".format(url_admin, urlsafe_base64_encode(force_bytes(user.id)), token)
-				email_args = {
-					'email': user.email,
-					'site_name': settings.SITE_NAME,
-					'user': user,
-					'email_link': email_link,
-				}
-
-				email_content, _ = default_render_template_email(email_template_name, email_args, site)
-
-				error = "Ocorreu um erro interno. Por favor tente novamente em alguns instantes."
-
-				try:
-					internal_subject = "Pedido para criar nova senha"
-					result = create_email(user.email, subject, email_content, internal_subject, "user.id:{}-uuid:{}".format(user.id, uuid4()))
-					if result is None:
-						raise Exception("Erro crítico! Objeto notification.Email não pode ser criado!")
-					else:
-						context['post_msg'] = "Se o email estiver associado a uma conta de usuário, você receberá um email com instruções para criar uma nova senha."
-				except Exception as e:
-					_, _, exc_tb = sys.exc_info()
-					notify_error(__file__, exc_tb.tb_lineno, e)
-
-					context['error'] = error
-			except Exception as e2:
-				_, _, exc_tb = sys.exc_info()
-				notify_error(__file__, exc_tb.tb_lineno, e2)
-
+			if _is_rate_limited('password-reset:ip:%s' % ip, settings.PASSWORD_RESET_RATE_PER_IP, window):
 				context['error'] = True
-				context['post_msg'] = "Usuário não encontrado!<br>Por favor, revise o email e tente novamente."
+				context['post_msg'] = "Muitas solicitações. Por favor, aguarde alguns minutos e tente novamente."
+			else:
+				# the user lookup, the email rendering and the delivery run in the
+				# celery task, the response is the same whether the account exists
+				# or not (and whether the email was throttled or not)
+				if not _is_rate_limited('password-reset:email:%s' % hashlib.sha256(email.encode()).hexdigest(), settings.PASSWORD_RESET_RATE_PER_EMAIL, window):
+					try:
+						send_password_reset_email.delay(email)
+					except Exception as e:
+						_, _, exc_tb = sys.exc_info()
+						log_message("Falha ao enfileirar o email de nova senha (linha %s): %s" % (exc_tb.tb_lineno, e), e)
+
+				context['post_msg'] = "Se o email estiver associado a uma conta de usuário, você receberá um email com instruções para criar uma nova senha."
 		else:
 			context['error'] = True
 			context['post_msg'] = "Parâmetros inválidos! Por favor, tente novamente."
@@ -177,3 +214,43 @@ class PasswordResetCompleteViewCustom(auth_views.PasswordResetCompleteView):
 		context['app_title'] = settings.SITE_NAME + " | Nova senha"
 		context['assets_url'] = settings.MEDIA_URL
 		return context
+
+
+@sync_to_async
+def _staff_required_response(request):
+	# request.user is a lazy object resolved with a sync database query
+	if not request.user.is_authenticated:
+		return JsonResponse({'detail': "Autenticação necessária."}, status=401)
+	if not request.user.is_staff:
+		return JsonResponse({'detail': "Permissão negada."}, status=403)
+	return None
+
+
+# async views: run without holding a worker thread while
+# waiting for the upstream services (see application/asgi.py)
+
+@closes_http_client
+async def cep_lookup(request, cep):
+	response = await _staff_required_response(request)
+	if response is not None:
+		return response
+
+	return JsonResponse(await aconsulta_cep(cep))
+
+
+async def celery_status(request):
+	response = await _staff_required_response(request)
+	if response is not None:
+		return response
+
+	is_available = await acan_call_celery("config.views.celery_status")
+	return JsonResponse({'available': is_available}, status=200 if is_available else 503)
+
+
+@login_required
+def db_pool_stats(request):
+	# stats of the connection pool of the process that served the request
+	if not request.user.is_staff:
+		return JsonResponse({'detail': "Permissão negada."}, status=403)
+
+	return JsonResponse(pool_stats())
@@ -1,3 +1,31 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.abstract.admin import AbstractModelAdmin
+from apps.abstract.history import history_buffer
+
+from .models import Grievance
+from .rollups import mark_days_dirty
+
+
+@admin.register(Grievance)
+class GrievanceAdmin(AbstractModelAdmin):
+    list_display = ('external_id', 'code', 'notified_at', 'patient_name', 'city', 'state')
+    list_filter = ('code', 'state', 'sex')
+    search_fields = ('=external_id', 'patient_name')
+    date_hierarchy = 'notified_at'
+    raw_id_fields = ('person',)
+    readonly_fields = ('uuid', 'created_at', 'updated_at')
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'POST':
+            return super().changelist_view(request, extra_context)
+
+        # the edits of the list (list_editable) and the actions write their
+        # history rows together, in the transaction of the changes
+        with history_buffer():
+            return super().changelist_view(request, extra_context)
+
+    def delete_queryset(self, request, queryset):
+        # the bulk (soft) delete doesn't send post_save
+        mark_days_dirty(queryset.values_list('notified_at', flat=True).distinct())
+        super().delete_queryset(request, queryset)
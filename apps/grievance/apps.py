@@ -1,7 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class GrievanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.grievance'
     verbose_name = 'Agravos'
+
+    def ready(self):
+        from .models import Grievance
+        from .rollups import mark_dirty_on_delete, mark_dirty_on_save
+
+        # the days of the written grievances are rebuilt by the next rollup refresh
+        post_save.connect(mark_dirty_on_save, sender=Grievance, dispatch_uid='grievance_rollups_on_save')
+        post_delete.connect(mark_dirty_on_delete, sender=Grievance, dispatch_uid='grievance_rollups_on_delete')
@@ -0,0 +1,24 @@
+from application.celery import app
+
+from .ingest import ingest_file
+
+
+@app.task(bind=True, acks_late=True)
+def ingest_grievance_file(self, path: str, chunk_size=None, resume=True, lookup_ceps=None):
+    """
+    Import a grievance export (see apps.grievance.ingest). The progress is
+    reported in the task state, a task interrupted (and delivered again, as
+    acks_late) continues from the last checkpoint.
+    """
+    def progress(stats):
+        self.update_state(state='PROGRESS', meta=stats)
+
+    return ingest_file(path, chunk_size=chunk_size, resume=resume, lookup_ceps=lookup_ceps, progress=progress)
+
+
+@app.task(ignore_result=True)
+def refresh_grievance_rollups():
+    """ Rebuild the rollups of the dirty days (scheduled in CELERY_BEAT_SCHEDULE). """
+    from .rollups import refresh_rollups
+
+    return refresh_rollups()
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from application.dashboard import dashboard_widget
+
+from .rollups import week_of
+from .stats import grievance_counts
+
+
+# the rollups are written in bulk (no post_save), apps.grievance.rollups
+# clears the cached widget after each refresh
+@dashboard_widget('grievances_by_week')
+def grievances_by_week():
+    """ Grievances of the last 12 weeks. """
+    start = week_of(timezone.localdate()) - timedelta(weeks=11)
+    return grievance_counts('week', start=start)
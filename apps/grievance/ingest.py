@@ -0,0 +1,289 @@
+import asyncio
+import csv
+from datetime import date, datetime
+from itertools import islice
+import logging
+import os
+import re
+from time import perf_counter
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+import orjson
+
+from apps.abstract.counters import reset_alive_count
+from apps.person.linkage import link_persons
+from apps.project.models import Project
+from apps.utils.async_utils import aconsulta_cep, close_http_client
+from apps.utils.utils import capitalize_name
+
+from .models import Grievance
+from .rollups import mark_days_dirty
+
+
+logger = logging.getLogger('apps.grievance.ingest')
+
+
+# Streaming import of the notification exports (csv or jsonl): the file is
+# read record by record, each chunk of records is normalized (the ceps of
+# the chunk are resolved together) and written with a single bulk_create,
+# then the checkpoint (<file>.checkpoint) is saved. Each grievance is
+# linked to its Person (apps.person.linkage). An interrupted import
+# restarts after the last committed chunk, and the records already in the
+# database (same external_id) are skipped, so re-running a chunk is safe.
+# Invalid records are written to <file>.rejects.jsonl.
+
+INGEST_FIELDS = (
+    'external_id', 'code', 'notified_at', 'patient_name', 'birth_date', 'sex',
+    'cep', 'street', 'neighborhood', 'city', 'state', 'municipality_code',
+)
+
+REQUIRED_FIELDS = ('external_id', 'code', 'notified_at', 'patient_name')
+
+# columns of the SINAN exports
+FIELD_ALIASES = {
+    'NU_NOTIFIC': 'external_id',
+    'ID_AGRAVO': 'code',
+    'DT_NOTIFIC': 'notified_at',
+    'NM_PACIENT': 'patient_name',
+    'DT_NASC': 'birth_date',
+    'CS_SEXO': 'sex',
+    'NU_CEP': 'cep',
+    'NM_LOGRADO': 'street',
+    'NM_BAIRRO': 'neighborhood',
+    'SG_UF': 'state',
+    'ID_MN_RESI': 'municipality_code',
+}
+
+# column with the Project.code of the record
+PROJECT_COLUMNS = ('project', 'PROJETO')
+
+_MAX_LENGTHS = {name: Grievance._meta.get_field(name).max_length for name in INGEST_FIELDS if Grievance._meta.get_field(name).max_length}
+
+_NOT_DIGITS = re.compile(r'\D')
+
+
+def read_records(path, skip=0):
+    """ The records (dicts) of a csv or jsonl file, read incrementally. An invalid json line is None. """
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            header = f.readline()
+            f.seek(0)
+            reader = csv.DictReader(f, delimiter=';' if header.count(';') > header.count(',') else ',')
+            yield from islice(reader, skip, None)
+        return
+
+    with open(path, 'rb') as f:
+        for line in islice((line for line in f if line.strip()), skip, None):
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield None
+
+
+def _parse_date(value):
+    value = str(value).strip()
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return datetime.strptime(value, '%d/%m/%Y').date()
+
+
+def normalize_record(record) -> dict:
+    """ The Grievance fields of a source record, raises ValueError when it's invalid. """
+    if not isinstance(record, dict):
+        raise ValueError("registro inválido")
+
+    data = {}
+    for key, value in record.items():
+        field = FIELD_ALIASES.get(key, key)
+        if field in INGEST_FIELDS and value not in (None, ''):
+            data[field] = str(value).strip()
+        elif key in PROJECT_COLUMNS and value not in (None, ''):
+            data['project_code'] = str(value).strip()
+
+    missing = [name for name in REQUIRED_FIELDS if not data.get(name)]
+    if missing:
+        raise ValueError("campos obrigatórios ausentes: %s" % ", ".join(missing))
+
+    data['code'] = data['code'].upper()
+    data['notified_at'] = _parse_date(data['notified_at'])
+    if 'birth_date' in data:
+        data['birth_date'] = _parse_date(data['birth_date'])
+    data['patient_name'] = capitalize_name(" ".join(data['patient_name'].split()))
+
+    sex = data.get('sex', 'I')[:1].upper()
+    data['sex'] = sex if sex in ('M', 'F') else 'I'
+
+    cep = _NOT_DIGITS.sub('', data.get('cep', ''))
+    data['cep'] = cep if len(cep) == 8 else ''
+
+    for name, max_length in _MAX_LENGTHS.items():
+        if len(data.get(name) or '') > max_length:
+            raise ValueError("%s excede %d caracteres" % (name, max_length))
+    return data
+
+
+async def _lookup_ceps(ceps):
+    semaphore = asyncio.Semaphore(settings.GRIEVANCE_INGEST_CEP_CONCURRENCY)
+
+    async def lookup(cep):
+        async with semaphore:
+            return cep, await aconsulta_cep(cep)
+
+    try:
+        return dict(await asyncio.gather(*(lookup(cep) for cep in ceps)))
+    finally:
+        await close_http_client()
+
+
+def resolve_ceps(ceps) -> dict:
+    """ {cep: address} of the ceps, from the cache, the misses looked up concurrently. """
+    keys = {'cep:%s' % cep: cep for cep in ceps}
+    addresses = {keys[key]: address for key, address in cache.get_many(keys).items()}
+
+    missing = [cep for cep in ceps if cep not in addresses]
+    if missing:
+        found = async_to_sync(_lookup_ceps)(missing)
+        cache.set_many({'cep:%s' % cep: address for cep, address in found.items() if address['uf']}, settings.CEP_CACHE_TIMEOUT)
+        # a cep not found (or a failed lookup) is retried only after a while
+        cache.set_many({'cep:%s' % cep: address for cep, address in found.items() if not address['uf']}, 60 * 60)
+        addresses.update(found)
+    return addresses
+
+
+def fill_addresses(rows):
+    addresses = resolve_ceps({row['cep'] for row in rows if row['cep']})
+    for row in rows:
+        address = addresses.get(row['cep'])
+        if not address or not address['uf']:
+            continue
+        row['street'] = address['logradouro'][:_MAX_LENGTHS['street']] or row.get('street', '')
+        row['neighborhood'] = address['bairro'][:_MAX_LENGTHS['neighborhood']] or row.get('neighborhood', '')
+        row['city'] = address['cidade'][:_MAX_LENGTHS['city']]
+        row['state'] = address['uf']
+
+
+def write_rows(rows) -> int:
+    """ bulk_create the rows not imported yet, returns how many were inserted. """
+    if not rows:
+        return 0
+
+    by_external_id = {row['external_id']: row for row in rows}
+    existing = set(Grievance.all_objects.filter(external_id__in=list(by_external_id)).values_list('external_id', flat=True))
+    rows = [row for external_id, row in by_external_id.items() if external_id not in existing]
+    if not rows:
+        return 0
+
+    project_codes = {row['project_code'] for row in rows if 'project_code' in row}
+    projects = dict(Project.objects.filter(code__in=project_codes).values_list('code', 'id')) if project_codes else {}
+    for row in rows:
+        row['project_id'] = projects.get(row.pop('project_code', None))
+
+    batch_size = settings.GRIEVANCE_INGEST_BATCH_SIZE
+    with transaction.atomic():
+        objs = [Grievance(**row) for row in rows]
+        # ignore_conflicts covers a concurrent import of the same records
+        Grievance.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+
+        # only the rows inserted here (MySQL doesn't return the ids of a bulk
+        # insert, the uuids are known) are counted and linked to a person
+        ids = dict(Grievance.all_objects.filter(uuid__in=[obj.uuid for obj in objs]).values_list('uuid', 'id'))
+        inserted = [(obj, row) for obj, row in zip(objs, rows) if obj.uuid in ids]
+        if not inserted:
+            return 0
+
+        # the patient of each grievance, found (or created) by the record linkage
+        person_ids = link_persons([row for _, row in inserted], batch_size=batch_size)
+        for (obj, _), person_id in zip(inserted, person_ids):
+            obj.pk = ids[obj.uuid]
+            obj.person_id = person_id
+        Grievance.all_objects.bulk_update([obj for obj, _ in inserted], ['person'], batch_size=batch_size)
+
+        # bulk_create doesn't send post_save: the history rows and the dirty
+        # days of the inserted rows
+        Grievance.history.bulk_history_create([obj for obj, _ in inserted], batch_size=batch_size)
+        mark_days_dirty(obj.notified_at for obj, _ in inserted)
+    return len(inserted)
+
+
+def _checkpoint_path(path):
+    return path + '.checkpoint'
+
+
+def load_checkpoint(path):
+    try:
+        with open(_checkpoint_path(path), 'rb') as f:
+            checkpoint = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+    # a different file with the same name starts over
+    return checkpoint if checkpoint.get('size') == os.path.getsize(path) else None
+
+
+def save_checkpoint(path, records):
+    tmp_path = _checkpoint_path(path) + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps({'records': records, 'size': os.path.getsize(path)}))
+    os.replace(tmp_path, _checkpoint_path(path))
+
+
+def ingest_file(path, chunk_size=None, resume=True, lookup_ceps=None, progress=None) -> dict:
+    """
+    Import the grievances of a csv or jsonl file (see the top of this
+    module). progress(stats) is called after each committed chunk.
+    """
+    chunk_size = chunk_size or settings.GRIEVANCE_INGEST_CHUNK_SIZE
+    lookup_ceps = settings.GRIEVANCE_INGEST_CEP_LOOKUP if lookup_ceps is None else lookup_ceps
+
+    checkpoint = load_checkpoint(path) if resume else None
+    done = checkpoint['records'] if checkpoint else 0
+    if done:
+        logger.info("Retomando a importação de %s a partir do registro %d", path, done + 1)
+
+    stats = {'records': done, 'inserted': 0, 'duplicated': 0, 'rejected': 0, 'elapsed': 0.0}
+    start = perf_counter()
+    records = read_records(path, skip=done)
+    rejects = None
+
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            rows = []
+            for position, record in enumerate(chunk, stats['records'] + 1):
+                try:
+                    rows.append(normalize_record(record))
+                except (ValueError, TypeError) as e:
+                    if rejects is None:
+                        rejects = open(path + '.rejects.jsonl', 'ab')
+                    rejects.write(orjson.dumps({'record': position, 'error': str(e), 'data': record}, default=str) + b'\n')
+                    stats['rejected'] += 1
+
+            if lookup_ceps:
+                fill_addresses(rows)
+            inserted = write_rows(rows)
+
+            stats['records'] += len(chunk)
+            stats['inserted'] += inserted
+            stats['duplicated'] += len(rows) - inserted
+            save_checkpoint(path, stats['records'])
+
+            stats['elapsed'] = perf_counter() - start
+            if progress is not None:
+                progress(dict(stats))
+    finally:
+        if rejects is not None:
+            rejects.close()
+        # bulk_create doesn't send post_save
+        reset_alive_count(Grievance)
+
+    if os.path.exists(_checkpoint_path(path)):
+        os.remove(_checkpoint_path(path))
+    logger.info("Importação de %s finalizada: %s", path, stats)
+    return stats
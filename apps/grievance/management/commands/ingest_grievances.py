@@ -0,0 +1,40 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.grievance.ingest import ingest_file
+
+
+class Command(BaseCommand):
+    help = "Importa os agravos de um arquivo csv ou jsonl, lendo o arquivo incrementalmente e gravando em lotes. Uma importação interrompida continua do último lote gravado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Arquivo .csv (separado por , ou ;) ou .jsonl.")
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--restart', action='store_true', help="Ignora o checkpoint e importa o arquivo desde o início.")
+        parser.add_argument('--no-cep', action='store_true', help="Não consulta os endereços pelo CEP.")
+        parser.add_argument('--celery', action='store_true', help="Executa a importação em uma task do celery.")
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.isfile(path):
+            raise CommandError("Arquivo não encontrado: %s" % path)
+
+        kwargs = {
+            'chunk_size': options['chunk_size'],
+            'resume': not options['restart'],
+            'lookup_ceps': False if options['no_cep'] else None,
+        }
+
+        if options['celery']:
+            from apps.grievance.celerytasks import ingest_grievance_file
+            result = ingest_grievance_file.delay(path, **kwargs)
+            self.stdout.write("Importação enviada ao celery: %s" % result.id)
+            return
+
+        stats = ingest_file(path, progress=self.report, **kwargs)
+        self.stdout.write(self.style.SUCCESS("Importação finalizada: %(records)d registros, %(inserted)d inseridos, %(duplicated)d já existentes, %(rejected)d rejeitados." % stats))
+
+    def report(self, stats):
+        rate = stats['records'] / stats['elapsed'] * 60 if stats['elapsed'] else 0
+        self.stdout.write("%(records)d registros (%(inserted)d inseridos, %(duplicated)d já existentes, %(rejected)d rejeitados)" % stats + " - %.0f registros/min" % rate)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.grievance.rollups import rebuild_all_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstrói todos os consolidados de agravos (por dia e por semana) a partir dos registros."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-days', type=int, default=None, help="Dias reconstruídos por transação.")
+
+    def handle(self, *args, **options):
+        try:
+            days = rebuild_all_rollups(options['batch_days'], progress=self.report)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS("Consolidados reconstruídos: %d dias." % days))
+
+    def report(self, done, total):
+        self.stdout.write("%d de %d dias" % (done, total))
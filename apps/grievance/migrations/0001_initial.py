@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+import apps.abstract.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Grievance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', apps.abstract.fields.BinaryUUIDField(default=apps.abstract.fields.uuid7, editable=False, unique=True)),
+                ('obs', models.TextField(blank=True, help_text='Observações de uso interno, não visível para os clientes.', max_length=500, null=True, verbose_name='Observações')),
+                ('enabled', models.BooleanField(default=True, help_text='Items não habilitados não serão visíveis aos clientes no site.', verbose_name='Habilitado')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora de quando o objeto foi registrado no sistema.', verbose_name='Data do cadastro')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora da última atualização feita no objeto no sistema.', verbose_name='Última atualização')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False, help_text='Items marcados como deletado não serão visíveis no sistema.', verbose_name='Deletado')),
+                ('external_id', models.CharField(help_text='Identificador da notificação no sistema de origem. Um registro já importado não é importado novamente.', max_length=64, unique=True, verbose_name='Número da notificação')),
+                ('code', models.CharField(help_text='Código CID-10 do agravo notificado.', max_length=10, verbose_name='Agravo (CID-10)')),
+                ('notified_at', models.DateField(verbose_name='Data da notificação')),
+                ('patient_name', models.CharField(max_length=150, verbose_name='Nome do paciente')),
+                ('birth_date', models.DateField(blank=True, null=True, verbose_name='Data de nascimento')),
+                ('sex', models.CharField(choices=[('M', 'Masculino'), ('F', 'Feminino'), ('I', 'Ignorado')], default='I', max_length=1, verbose_name='Sexo')),
+                ('cep', models.CharField(blank=True, max_length=8, verbose_name='CEP')),
+                ('street', models.CharField(blank=True, max_length=255, verbose_name='Logradouro')),
+                ('neighborhood', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Município')),
+                ('state', models.CharField(blank=True, max_length=2, verbose_name='UF')),
+                ('municipality_code', models.CharField(blank=True, help_text='Município de residência do paciente.', max_length=7, verbose_name='Código IBGE do município')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='created_by_%(class)s_related', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+            ],
+            options={
+                'verbose_name': 'Agravo',
+                'verbose_name_plural': 'Agravos',
+                'ordering': ['-created_at'],
+                'abstract': False,
+                'indexes': [
+                    models.Index(fields=['code', 'notified_at'], name='grievance_code_notified_idx'),
+                    models.Index(fields=['municipality_code', 'notified_at'], name='grievance_municipality_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('person', '0001_initial'),
+        ('grievance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grievance',
+            name='person',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='grievances', to='person.person', verbose_name='Paciente'),
+        ),
+    ]
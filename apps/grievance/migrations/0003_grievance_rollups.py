@@ -0,0 +1,67 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0001_initial'),
+        ('grievance', '0002_grievance_person'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grievance',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='grievances', to='project.project', verbose_name='Projeto'),
+        ),
+        migrations.AddIndex(
+            model_name='grievance',
+            index=models.Index(fields=['notified_at'], name='grievance_notified_idx'),
+        ),
+        migrations.CreateModel(
+            name='GrievanceDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, verbose_name='Agravo (CID-10)')),
+                ('municipality_code', models.CharField(blank=True, max_length=7, verbose_name='Código IBGE do município')),
+                ('project_key', models.BigIntegerField(default=0, verbose_name='Projeto')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('day', models.DateField(verbose_name='Dia')),
+            ],
+            options={
+                'verbose_name': 'Agravos por dia',
+                'verbose_name_plural': 'Agravos por dia',
+                'constraints': [
+                    models.UniqueConstraint(fields=('day', 'code', 'municipality_code', 'project_key'), name='grievance_daily_count_uniq'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='GrievanceWeeklyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, verbose_name='Agravo (CID-10)')),
+                ('municipality_code', models.CharField(blank=True, max_length=7, verbose_name='Código IBGE do município')),
+                ('project_key', models.BigIntegerField(default=0, verbose_name='Projeto')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('week', models.DateField(help_text='Segunda-feira da semana.', verbose_name='Semana')),
+            ],
+            options={
+                'verbose_name': 'Agravos por semana',
+                'verbose_name_plural': 'Agravos por semana',
+                'constraints': [
+                    models.UniqueConstraint(fields=('week', 'code', 'municipality_code', 'project_key'), name='grievance_weekly_count_uniq'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='GrievanceRollupDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
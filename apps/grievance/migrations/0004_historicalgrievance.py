@@ -0,0 +1,59 @@
+import apps.abstract.fields
+import django.db.models.deletion
+import django.utils.timezone
+import simple_history.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grievance', '0003_grievance_rollups'),
+        ('person', '0001_initial'),
+        ('project', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricalGrievance',
+            fields=[
+                ('id', models.BigIntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
+                ('uuid', apps.abstract.fields.BinaryUUIDField(db_index=True, default=apps.abstract.fields.uuid7, editable=False)),
+                ('obs', models.TextField(blank=True, help_text='Observações de uso interno, não visível para os clientes.', max_length=500, null=True, verbose_name='Observações')),
+                ('enabled', models.BooleanField(default=True, help_text='Items não habilitados não serão visíveis aos clientes no site.', verbose_name='Habilitado')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora de quando o objeto foi registrado no sistema.', verbose_name='Data do cadastro')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora da última atualização feita no objeto no sistema.', verbose_name='Última atualização')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False, help_text='Items marcados como deletado não serão visíveis no sistema.', verbose_name='Deletado')),
+                ('external_id', models.CharField(db_index=True, help_text='Identificador da notificação no sistema de origem. Um registro já importado não é importado novamente.', max_length=64, verbose_name='Número da notificação')),
+                ('code', models.CharField(help_text='Código CID-10 do agravo notificado.', max_length=10, verbose_name='Agravo (CID-10)')),
+                ('notified_at', models.DateField(verbose_name='Data da notificação')),
+                ('patient_name', models.CharField(max_length=150, verbose_name='Nome do paciente')),
+                ('birth_date', models.DateField(blank=True, null=True, verbose_name='Data de nascimento')),
+                ('sex', models.CharField(choices=[('M', 'Masculino'), ('F', 'Feminino'), ('I', 'Ignorado')], default='I', max_length=1, verbose_name='Sexo')),
+                ('cep', models.CharField(blank=True, max_length=8, verbose_name='CEP')),
+                ('street', models.CharField(blank=True, max_length=255, verbose_name='Logradouro')),
+                ('neighborhood', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Município')),
+                ('state', models.CharField(blank=True, max_length=2, verbose_name='UF')),
+                ('municipality_code', models.CharField(blank=True, help_text='Município de residência do paciente.', max_length=7, verbose_name='Código IBGE do município')),
+                ('history_id', models.AutoField(primary_key=True, serialize=False)),
+                ('history_date', models.DateTimeField(db_index=True)),
+                ('history_change_reason', models.CharField(max_length=100, null=True)),
+                ('history_type', models.CharField(choices=[('+', 'Created'), ('~', 'Changed'), ('-', 'Deleted')], max_length=1)),
+                ('created_by', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+                ('history_user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('person', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='person.person', verbose_name='Paciente')),
+                ('project', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='project.project', verbose_name='Projeto')),
+            ],
+            options={
+                'verbose_name': 'historical Agravo',
+                'verbose_name_plural': 'historical Agravos',
+                'ordering': ('-history_date', '-history_id'),
+                'get_latest_by': ('history_date', 'history_id'),
+            },
+            bases=(simple_history.models.HistoricalChanges, models.Model),
+        ),
+    ]
@@ -1,3 +1,147 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from apps.abstract.history import BufferedHistoricalRecords
+from apps.abstract.models import AbstractModel
+
+
+class Grievance(AbstractModel):
+    SEX_CHOICES = (
+        ('M', 'Masculino'),
+        ('F', 'Feminino'),
+        ('I', 'Ignorado'),
+    )
+
+    external_id = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Número da notificação",
+        help_text="Identificador da notificação no sistema de origem. Um registro já importado não é importado novamente.")
+    code = models.CharField(
+        max_length=10,
+        verbose_name="Agravo (CID-10)",
+        help_text="Código CID-10 do agravo notificado.")
+    notified_at = models.DateField(
+        verbose_name="Data da notificação")
+    patient_name = models.CharField(
+        max_length=150,
+        verbose_name="Nome do paciente")
+    birth_date = models.DateField(
+        verbose_name="Data de nascimento",
+        null=True,
+        blank=True)
+    sex = models.CharField(
+        max_length=1,
+        choices=SEX_CHOICES,
+        default='I',
+        verbose_name="Sexo")
+    cep = models.CharField(
+        max_length=8,
+        verbose_name="CEP",
+        blank=True)
+    street = models.CharField(
+        max_length=255,
+        verbose_name="Logradouro",
+        blank=True)
+    neighborhood = models.CharField(
+        max_length=100,
+        verbose_name="Bairro",
+        blank=True)
+    city = models.CharField(
+        max_length=100,
+        verbose_name="Município",
+        blank=True)
+    state = models.CharField(
+        max_length=2,
+        verbose_name="UF",
+        blank=True)
+    municipality_code = models.CharField(
+        max_length=7,
+        verbose_name="Código IBGE do município",
+        help_text="Município de residência do paciente.",
+        blank=True)
+    person = models.ForeignKey(
+        'person.Person',
+        on_delete=models.RESTRICT,
+        related_name='grievances',
+        verbose_name="Paciente",
+        null=True,
+        blank=True)
+    project = models.ForeignKey(
+        'project.Project',
+        on_delete=models.RESTRICT,
+        related_name='grievances',
+        verbose_name="Projeto",
+        null=True,
+        blank=True)
+
+    # batched in the admin changelist (see GrievanceAdmin) and the import
+    history = BufferedHistoricalRecords()
+
+    class Meta(AbstractModel.Meta):
+        verbose_name = 'Agravo'
+        verbose_name_plural = 'Agravos'
+        indexes = [
+            models.Index(fields=['code', 'notified_at'], name='grievance_code_notified_idx'),
+            models.Index(fields=['municipality_code', 'notified_at'], name='grievance_municipality_idx'),
+            # rebuild of the rollups of a day (apps.grievance.rollups)
+            models.Index(fields=['notified_at'], name='grievance_notified_idx'),
+        ]
+
+    def __str__(self):
+        return "%s - %s (%s)" % (self.external_id, self.code, self.notified_at.strftime("%d/%m/%Y"))
+
+
+class GrievanceRollup(models.Model):
+    """ Count of the grievances (not deleted) of a period by dimension, see apps.grievance.rollups. """
+    code = models.CharField(
+        max_length=10,
+        verbose_name="Agravo (CID-10)")
+    municipality_code = models.CharField(
+        max_length=7,
+        verbose_name="Código IBGE do município",
+        blank=True)
+    # the project id, 0 when the grievance has no project (a NULL would not
+    # be unique in the unique index)
+    project_key = models.BigIntegerField(
+        default=0,
+        verbose_name="Projeto")
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Quantidade")
+
+    class Meta:
+        abstract = True
+
+
+class GrievanceDailyCount(GrievanceRollup):
+    day = models.DateField(
+        verbose_name="Dia")
+
+    class Meta:
+        verbose_name = 'Agravos por dia'
+        verbose_name_plural = 'Agravos por dia'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'code', 'municipality_code', 'project_key'], name='grievance_daily_count_uniq'),
+        ]
+
+
+class GrievanceWeeklyCount(GrievanceRollup):
+    week = models.DateField(
+        verbose_name="Semana",
+        help_text="Segunda-feira da semana.")
+
+    class Meta:
+        verbose_name = 'Agravos por semana'
+        verbose_name_plural = 'Agravos por semana'
+        constraints = [
+            models.UniqueConstraint(fields=['week', 'code', 'municipality_code', 'project_key'], name='grievance_weekly_count_uniq'),
+        ]
+
+
+class GrievanceRollupDirtyDay(models.Model):
+    """ A day whose rollups must be rebuilt (a grievance of the day was written). """
+    day = models.DateField(
+        unique=True)
+    marked_at = models.DateTimeField(
+        default=timezone.now)
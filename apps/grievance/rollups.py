@@ -0,0 +1,168 @@
+from datetime import timedelta
+from functools import reduce
+import logging
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from application.dashboard import DASHBOARD_WIDGET_KEY
+from application.db.locks import named_lock
+
+from .models import Grievance, GrievanceDailyCount, GrievanceRollupDirtyDay, GrievanceWeeklyCount
+
+
+logger = logging.getLogger('apps.grievance.rollups')
+
+
+# Counts of the grievances by day and by week (code, municipality and
+# project), read by the dashboard and the stats api instead of a GROUP BY
+# over the grievances. A write of grievances only marks its days as dirty
+# (post_save/post_delete, the import, the admin bulk delete), the dirty days
+# are rebuilt in batches by refresh_rollups (celery beat, see
+# CELERY_BEAT_SCHEDULE). rebuild_all_rollups rebuilds everything.
+
+REFRESH_LOCK_NAME = 'grievance:rollups'
+
+# dashboard widgets read from the rollups (apps.grievance.dashboard)
+ROLLUP_WIDGETS = ('grievances_by_week',)
+
+
+def week_of(day):
+    return day - timedelta(days=day.weekday())
+
+
+def mark_days_dirty(days):
+    """ Mark the days to be rebuilt by the next refresh_rollups (one upsert). """
+    days = {day for day in days if day}
+    if not days:
+        return
+
+    now = timezone.now()
+    # unique_fields isn't accepted by MySQL (ON DUPLICATE KEY UPDATE has no target)
+    unique_fields = ['day'] if connection.features.supports_update_conflicts_with_target else None
+    GrievanceRollupDirtyDay.objects.bulk_create(
+        [GrievanceRollupDirtyDay(day=day, marked_at=now) for day in days],
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=['marked_at'])
+
+
+def mark_dirty_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    # the previous day too, when notified_at changed (AbstractModel keeps
+    # the loaded values)
+    days = {instance.notified_at, getattr(instance, '_loaded_values', {}).get('notified_at')}
+    transaction.on_commit(lambda: mark_days_dirty(days))
+
+
+def mark_dirty_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: mark_days_dirty([instance.notified_at]))
+
+
+def rebuild_days(days):
+    """ Rebuild the daily rollups of the days and the weekly rollups of their weeks. """
+    weeks = {week_of(day) for day in days}
+    week_days = [week + timedelta(days=i) for week in weeks for i in range(7)]
+
+    with transaction.atomic():
+        GrievanceDailyCount.objects.filter(day__in=days).delete()
+        daily = (
+            Grievance.objects.filter(notified_at__in=days)
+            .values('notified_at', 'code', 'municipality_code', 'project_id')
+            .annotate(total=Count('id'))
+            .order_by())
+        GrievanceDailyCount.objects.bulk_create([
+            GrievanceDailyCount(
+                day=row['notified_at'],
+                code=row['code'],
+                municipality_code=row['municipality_code'],
+                project_key=row['project_id'] or 0,
+                count=row['total'])
+            for row in daily], batch_size=1000)
+
+        # the weeks are summed from the daily rollups (at most 7 days each)
+        GrievanceWeeklyCount.objects.filter(week__in=weeks).delete()
+        weekly = (
+            GrievanceDailyCount.objects.filter(day__in=week_days)
+            .annotate(week=TruncWeek('day'))
+            .values('week', 'code', 'municipality_code', 'project_key')
+            .annotate(total=Sum('count'))
+            .order_by())
+        GrievanceWeeklyCount.objects.bulk_create([
+            GrievanceWeeklyCount(
+                week=row['week'],
+                code=row['code'],
+                municipality_code=row['municipality_code'],
+                project_key=row['project_key'],
+                count=row['total'])
+            for row in weekly], batch_size=1000)
+
+
+def _clear_widgets():
+    cache.delete_many([DASHBOARD_WIDGET_KEY % name for name in ROLLUP_WIDGETS])
+
+
+def refresh_rollups(batch_days=None) -> int:
+    """ Rebuild the days marked as dirty until now, returns how many days were rebuilt. """
+    batch_days = batch_days or settings.GRIEVANCE_ROLLUP_BATCH_DAYS
+
+    # a single refresh at a time (two rebuilds of the same day would conflict)
+    with named_lock(REFRESH_LOCK_NAME, settings.GRIEVANCE_ROLLUP_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Atualização dos consolidados de agravos já em execução")
+            return 0
+
+        refreshed = 0
+        until = timezone.now()
+        while True:
+            dirty = list(
+                GrievanceRollupDirtyDay.objects.filter(marked_at__lte=until)
+                .order_by('day').values_list('day', 'marked_at')[:batch_days])
+            if not dirty:
+                break
+
+            rebuild_days([day for day, _ in dirty])
+
+            # a day marked again during the rebuild stays dirty for the next refresh
+            GrievanceRollupDirtyDay.objects.filter(reduce(or_, (Q(day=day, marked_at=marked_at) for day, marked_at in dirty))).delete()
+            refreshed += len(dirty)
+
+    if refreshed:
+        _clear_widgets()
+    return refreshed
+
+
+def rebuild_all_rollups(batch_days=None, progress=None) -> int:
+    """ Rebuild the rollups of all the days, returns how many days were rebuilt. """
+    batch_days = batch_days or settings.GRIEVANCE_ROLLUP_BATCH_DAYS
+
+    with named_lock(REFRESH_LOCK_NAME, settings.GRIEVANCE_ROLLUP_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            raise RuntimeError("Atualização dos consolidados de agravos já em execução.")
+
+        # each batch replaces the rollups of its days atomically, the
+        # dashboard keeps reading the previous counts of the other days (and
+        # a failed rebuild leaves the dirty days to the next refresh)
+        until = timezone.now()
+        days = list(Grievance.objects.dates('notified_at', 'day', order='ASC'))
+        for start in range(0, len(days), batch_days):
+            rebuild_days(days[start:start + batch_days])
+            if progress is not None:
+                progress(min(start + batch_days, len(days)), len(days))
+
+        # the days and weeks without grievances anymore
+        with transaction.atomic():
+            GrievanceDailyCount.objects.exclude(day__in=Grievance.objects.values('notified_at')).delete()
+            GrievanceWeeklyCount.objects.exclude(
+                week__in=GrievanceDailyCount.objects.annotate(week=TruncWeek('day')).values('week')).delete()
+            GrievanceRollupDirtyDay.objects.filter(marked_at__lte=until).delete()
+
+    _clear_widgets()
+    return len(days)
@@ -0,0 +1,58 @@
+from django.db.models import Sum
+
+from .models import GrievanceDailyCount, GrievanceWeeklyCount
+from .rollups import week_of
+
+
+# Aggregated counts of the grievances, read from the rollups
+# (apps.grievance.rollups) instead of the grievances table.
+
+PERIODS = {
+    'day': (GrievanceDailyCount, 'day'),
+    'week': (GrievanceWeeklyCount, 'week'),
+}
+
+DIMENSIONS = {
+    'code': 'code',
+    'municipality': 'municipality_code',
+    'project': 'project_key',
+}
+
+
+def grievance_counts(period='week', group_by=(), start=None, end=None, code=None, municipality=None, project=None) -> list:
+    """
+    [{<period>: date, <dimension>: value, ..., 'count': n}] of the period
+    (day or week), grouped by the dimensions (code, municipality, project)
+    and filtered by the dates (start and end included) and dimension values.
+    """
+    model, period_field = PERIODS[period]
+    fields = [DIMENSIONS[name] for name in group_by]
+
+    # the week of the start date is included, its rollup is keyed by the monday
+    if period == 'week' and start is not None:
+        start = week_of(start)
+
+    queryset = model.objects.all()
+    if start is not None:
+        queryset = queryset.filter(**{'%s__gte' % period_field: start})
+    if end is not None:
+        queryset = queryset.filter(**{'%s__lte' % period_field: end})
+    if code is not None:
+        queryset = queryset.filter(code=code)
+    if municipality is not None:
+        queryset = queryset.filter(municipality_code=municipality)
+    if project is not None:
+        queryset = queryset.filter(project_key=project)
+
+    rows = queryset.values(period_field, *fields).annotate(total=Sum('count')).order_by(period_field, *fields)
+
+    # the public names of the dimensions (project_key 0 is no project)
+    names = {field: name for name, field in DIMENSIONS.items()}
+    results = []
+    for row in rows:
+        result = {period: row[period_field]}
+        for field in fields:
+            result[names[field]] = row[field] if field != 'project_key' else row[field] or None
+        result['count'] = row['total']
+        results.append(result)
+    return results
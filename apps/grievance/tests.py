@@ -1,3 +1,165 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.person.models import Person
+
+from .ingest import normalize_record, write_rows
+from . import rollups
+from .models import Grievance, GrievanceDailyCount, GrievanceRollupDirtyDay, GrievanceWeeklyCount
+from .rollups import REFRESH_LOCK_NAME, rebuild_all_rollups, refresh_rollups
+from .stats import grievance_counts
+
+
+def record(external_id, name="Maria da Silva", notified_at='2024-03-06', birth_date='1980-01-02'):
+    return normalize_record({
+        'NU_NOTIFIC': external_id,
+        'ID_AGRAVO': 'a90',
+        'DT_NOTIFIC': notified_at,
+        'NM_PACIENT': name,
+        'DT_NASC': birth_date,
+        'CS_SEXO': 'F',
+    })
+
+
+class WriteRowsTests(TestCase):
+
+    def test_counts_and_links_only_the_new_rows(self):
+        self.assertEqual(write_rows([record('1')]), 1)
+        self.assertEqual(Person.objects.count(), 1)
+
+        # an imported record and a record repeated in the chunk
+        inserted = write_rows([record('1', name="Outra Pessoa"), record('2', name="João Souza"), record('2', name="João Souza")])
+        self.assertEqual(inserted, 1)
+        self.assertEqual(Grievance.objects.count(), 2)
+        self.assertEqual(Person.objects.count(), 2)
+
+        grievance = Grievance.objects.get(external_id='2')
+        self.assertEqual(grievance.person.name, "João Souza")
+        self.assertEqual(grievance.code, 'A90')
+        self.assertEqual(grievance.notified_at, date(2024, 3, 6))
+
+    def test_same_patient_is_linked_once(self):
+        self.assertEqual(write_rows([record('1'), record('2', notified_at='2024-03-07')]), 2)
+        self.assertEqual(Person.objects.count(), 1)
+        self.assertEqual(len(set(Grievance.objects.values_list('person', flat=True))), 1)
+
+
+class RollupTests(TestCase):
+
+    def create(self, external_id, notified_at, code='A90'):
+        return Grievance.objects.create(external_id=external_id, code=code, notified_at=notified_at, patient_name="Maria da Silva")
+
+    def test_rebuild_all(self):
+        # wednesday and friday of the same week, monday of the next one
+        for external_id, notified_at in (('1', date(2024, 3, 6)), ('2', date(2024, 3, 6)), ('3', date(2024, 3, 8)), ('4', date(2024, 3, 11))):
+            self.create(external_id, notified_at)
+
+        self.assertEqual(rebuild_all_rollups(), 3)
+        self.assertEqual(grievance_counts('day'), [
+            {'day': date(2024, 3, 6), 'count': 2},
+            {'day': date(2024, 3, 8), 'count': 1},
+            {'day': date(2024, 3, 11), 'count': 1},
+        ])
+        self.assertEqual(grievance_counts('week', group_by=('code',)), [
+            {'week': date(2024, 3, 4), 'code': 'A90', 'count': 3},
+            {'week': date(2024, 3, 11), 'code': 'A90', 'count': 1},
+        ])
+        self.assertFalse(GrievanceRollupDirtyDay.objects.exists())
+
+    def test_rebuild_all_removes_the_days_without_grievances(self):
+        self.create('1', date(2024, 3, 6))
+        self.create('2', date(2024, 3, 11))
+        rebuild_all_rollups()
+
+        # deleted without the signals (a bulk update)
+        Grievance.objects.filter(external_id='2').update(is_deleted=True)
+        self.assertEqual(rebuild_all_rollups(), 1)
+        self.assertEqual(list(GrievanceDailyCount.objects.values_list('day', flat=True)), [date(2024, 3, 6)])
+        self.assertEqual(list(GrievanceWeeklyCount.objects.values_list('week', flat=True)), [date(2024, 3, 4)])
+
+    def test_failed_rebuild_all_keeps_the_other_days(self):
+        self.create('1', date(2024, 3, 6))
+        self.create('2', date(2024, 3, 11))
+        rebuild_all_rollups()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create('3', date(2024, 3, 6))
+            self.create('4', date(2024, 3, 11))
+
+        rebuild_days = rollups.rebuild_days
+
+        def fail_on_the_second_batch(days):
+            if date(2024, 3, 11) in days:
+                raise RuntimeError
+            rebuild_days(days)
+
+        with mock.patch.object(rollups, 'rebuild_days', fail_on_the_second_batch):
+            with self.assertRaises(RuntimeError):
+                rebuild_all_rollups(batch_days=1)
+
+        # the first day was rebuilt, the second keeps its previous count
+        self.assertEqual(grievance_counts('day'), [
+            {'day': date(2024, 3, 6), 'count': 2},
+            {'day': date(2024, 3, 11), 'count': 1},
+        ])
+        # and is rebuilt by the next refresh
+        self.assertEqual(refresh_rollups(), 2)
+        self.assertEqual(grievance_counts('day'), [
+            {'day': date(2024, 3, 6), 'count': 2},
+            {'day': date(2024, 3, 11), 'count': 2},
+        ])
+
+    def test_week_of_a_mid_week_start_is_included(self):
+        self.create('1', date(2024, 3, 6))
+        self.create('2', date(2024, 3, 11))
+        rebuild_all_rollups()
+
+        self.assertEqual(grievance_counts('week', start=date(2024, 3, 7)), [
+            {'week': date(2024, 3, 4), 'count': 1},
+            {'week': date(2024, 3, 11), 'count': 1},
+        ])
+        self.assertEqual(grievance_counts('day', start=date(2024, 3, 7)), [{'day': date(2024, 3, 11), 'count': 1}])
+
+    def test_refresh_rebuilds_the_dirty_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            grievance = self.create('1', date(2024, 3, 6))
+            self.create('2', date(2024, 3, 6))
+        self.assertEqual(refresh_rollups(), 1)
+        self.assertEqual(grievance_counts('day'), [{'day': date(2024, 3, 6), 'count': 2}])
+
+        # the previous day of a moved grievance is rebuilt too
+        with self.captureOnCommitCallbacks(execute=True):
+            grievance.notified_at = date(2024, 3, 12)
+            grievance.save()
+        self.assertEqual(refresh_rollups(), 2)
+        self.assertEqual(grievance_counts('week'), [
+            {'week': date(2024, 3, 4), 'count': 1},
+            {'week': date(2024, 3, 11), 'count': 1},
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grievance.delete()
+        self.assertEqual(refresh_rollups(), 1)
+        self.assertEqual(grievance_counts('week'), [{'week': date(2024, 3, 4), 'count': 1}])
+        self.assertEqual(refresh_rollups(), 0)
+
+    def test_a_single_refresh_at_a_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create('1', date(2024, 3, 6))
+
+        # another worker holds the lock
+        cache.set('lock:%s' % REFRESH_LOCK_NAME, 'other', 60)
+        try:
+            self.assertEqual(refresh_rollups(), 0)
+            with self.assertRaises(RuntimeError):
+                rebuild_all_rollups()
+            # the lock of the other worker is kept
+            self.assertEqual(cache.get('lock:%s' % REFRESH_LOCK_NAME), 'other')
+        finally:
+            cache.delete('lock:%s' % REFRESH_LOCK_NAME)
+
+        self.assertEqual(refresh_rollups(), 1)
+        self.assertIsNone(cache.get('lock:%s' % REFRESH_LOCK_NAME))
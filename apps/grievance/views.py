@@ -1,3 +1,35 @@
-from django.shortcuts import render
+from datetime import date
 
-# Create your views here.
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+
+from .stats import DIMENSIONS, PERIODS, grievance_counts
+
+
+@login_required
+def grievance_stats(request):
+    """
+    Counts of the grievances from the rollups, e.g.
+    /api/grievance-stats/?period=week&group_by=code,municipality&start=2024-01-01
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'detail': "Permissão negada."}, status=403)
+
+    period = request.GET.get('period', 'week')
+    group_by = [name for name in request.GET.get('group_by', '').split(',') if name]
+    if period not in PERIODS or any(name not in DIMENSIONS for name in group_by):
+        return JsonResponse({'detail': "Parâmetros inválidos: period (%s) e group_by (%s)." % ("|".join(PERIODS), ",".join(DIMENSIONS))}, status=400)
+
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        project = int(request.GET['project']) if request.GET.get('project') else None
+    except ValueError:
+        return JsonResponse({'detail': "Parâmetros inválidos: start e end (AAAA-MM-DD), project (id)."}, status=400)
+
+    results = grievance_counts(
+        period, group_by, start, end,
+        code=request.GET.get('code') or None,
+        municipality=request.GET.get('municipality') or None,
+        project=project)
+    return JsonResponse({'period': period, 'group_by': group_by, 'results': results})
@@ -1,3 +1,14 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.abstract.admin import AbstractModelAdmin
+
+from .models import Person
+
+
+@admin.register(Person)
+class PersonAdmin(AbstractModelAdmin):
+    list_display = ('name', 'birth_date', 'sex', 'cep', 'duplicate_of')
+    list_filter = ('sex',)
+    search_fields = ('=name_key', 'name')
+    raw_id_fields = ('duplicate_of',)
+    readonly_fields = ('uuid', 'name_key', 'phonetic_key', 'created_at', 'updated_at')
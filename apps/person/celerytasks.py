@@ -0,0 +1,9 @@
+from application.celery import app
+
+from .dedup import run_dedup
+
+
+@app.task(ignore_result=True)
+def dedup_persons(chunk_size=None, workers=None):
+    """ Batch deduplication of the persons (see apps.person.dedup), can be scheduled in the celery beat. """
+    return run_dedup(chunk_size=chunk_size, workers=workers)
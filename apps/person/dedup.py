@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import logging
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count
+
+from application.db.mysql_pool.pool import pool_capacity
+
+from .linkage import PersonIndex
+from .models import Person
+
+
+logger = logging.getLogger('apps.person.dedup')
+
+
+# Batch deduplication of the persons already registered. The duplicates are
+# only searched inside the blocks of the record linkage with more than one
+# person: first the (phonetic_key, birth_date) blocks, then the
+# (phonetic_key, cep) blocks. The blocks of a phase don't share persons, so
+# their chunks run in parallel threads. A duplicate is kept (soft), pointing
+# to the oldest person of its cluster (duplicate_of), and its grievances are
+# moved to it. Each thread holds a connection for a whole chunk, so there are
+# no more threads than the connection pool can serve (one connection is left
+# to the main thread).
+
+PHASES = ('birth_date', 'cep')
+
+
+def duplicate_blocks(field) -> list:
+    """ [(phonetic_key, value)] of the blocks of the field with more than one person. """
+    queryset = Person.objects.filter(duplicate_of=None).exclude(**{field: None})
+    if field == 'cep':
+        queryset = queryset.exclude(cep='')
+    return list(
+        queryset.values('phonetic_key', field).annotate(n=Count('id')).filter(n__gt=1).order_by().values_list('phonetic_key', field))
+
+
+def dedup_block(field, phonetic_key, value) -> int:
+    """ Cluster the persons of a block, returns how many duplicates were found. """
+    from apps.grievance.models import Grievance
+
+    with transaction.atomic():
+        persons = Person.objects.select_for_update().filter(duplicate_of=None, phonetic_key=phonetic_key, **{field: value}).order_by('id')
+
+        index, clusters = PersonIndex(), {}
+        for person in persons:
+            canonical = index.find(person)
+            if canonical is None:
+                index.add(person)
+            else:
+                clusters.setdefault(canonical.id, []).append(person.id)
+
+        for canonical_id, duplicate_ids in clusters.items():
+            Person.all_objects.filter(pk__in=duplicate_ids).update(duplicate_of=canonical_id)
+            Person.all_objects.filter(duplicate_of__in=duplicate_ids).update(duplicate_of=canonical_id)
+            Grievance.all_objects.filter(person__in=duplicate_ids).update(person=canonical_id)
+
+    return sum(len(duplicate_ids) for duplicate_ids in clusters.values())
+
+
+def dedup_blocks(field, blocks) -> int:
+    """ Dedup a chunk of blocks (in a thread of run_dedup, or a celery task). """
+    try:
+        if field == 'birth_date':
+            blocks = [(phonetic_key, date.fromisoformat(value) if isinstance(value, str) else value) for phonetic_key, value in blocks]
+        return sum(dedup_block(field, phonetic_key, value) for phonetic_key, value in blocks)
+    finally:
+        # each thread opens its own connections
+        connections.close_all()
+
+
+def max_workers(workers) -> int:
+    """ The threads of run_dedup, at most the connections of the pool but one. """
+    capacity = pool_capacity()
+    if capacity is not None and workers >= capacity:
+        logger.info("Deduplicação limitada a %d threads (pool de %d conexões)", max(capacity - 1, 1), capacity)
+        workers = max(capacity - 1, 1)
+    return workers
+
+
+def run_dedup(chunk_size=None, workers=None, progress=None) -> int:
+    """ Dedup all the blocks, returns how many duplicates were found. """
+    chunk_size = chunk_size or settings.PERSON_DEDUP_CHUNK_SIZE
+    workers = max_workers(workers or settings.PERSON_DEDUP_WORKERS)
+
+    total = 0
+    for field in PHASES:
+        blocks = duplicate_blocks(field)
+        chunks = [blocks[i:i + chunk_size] for i in range(0, len(blocks), chunk_size)]
+        logger.info("Deduplicação por %s: %d blocos em %d lotes", field, len(blocks), len(chunks))
+
+        # the connection of duplicate_blocks goes back to the pool while the threads run
+        connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for done, found in enumerate(executor.map(lambda chunk: dedup_blocks(field, chunk), chunks), 1):
+                total += found
+                if progress is not None:
+                    progress(field, done, len(chunks), total)
+
+    return total
@@ -0,0 +1,62 @@
+from functools import lru_cache
+import re
+
+from unidecode import unidecode
+
+
+# Keys of the record linkage of Person: a normalized name (no accents, no
+# case, no particles) and a phonetic key of the first and last names, so the
+# spelling variants of a name (Luiz/Luis, Thaís/Tais, Sousa/Souza) fall in
+# the same block. Candidates are the persons of the same block with the
+# same birth date (or cep, when the birth date is unknown): an index lookup
+# instead of a scan.
+
+PARTICLES = {'da', 'das', 'de', 'des', 'do', 'dos', 'du', 'dus', 'di', 'e'}
+
+_NOT_LETTERS = re.compile(r'[^a-z ]')
+
+# simplified BuscaBR (phonetic algorithm for brazilian portuguese names),
+# applied in order
+_PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in (
+    (r'[^A-Z]', ''),
+    (r'B[LR]', 'B'),
+    (r'PH', 'F'),
+    (r'(GL|GR|MG|NG|RG)', 'G'),
+    (r'Y', 'I'),
+    (r'(GE|GI|RJ|MJ)', 'J'),
+    (r'(CA|CO|CU|CK|Q)', 'K'),
+    (r'(CE|CI|CH|CS|RS|TS|X|Z)', 'S'),
+    (r'(TR|TL|CT|RT|ST|PT)', 'T'),
+    (r'N', 'M'),
+    (r'PR', 'P'),
+    (r'L', 'R'),
+    (r'W', 'V'),
+    (r'C', 'K'),
+    (r'H', ''),
+    (r'(?<=.)[AEIOU]', ''),
+    (r'(.)\1+', r'\1'),
+)]
+
+
+def normalize_name(name: str) -> str:
+    """ Lowercase name without accents, punctuation and particles. """
+    words = _NOT_LETTERS.sub(' ', unidecode(name or '').lower()).split()
+    return ' '.join(word for word in words if word not in PARTICLES)
+
+
+@lru_cache(maxsize=50000)
+def phonetic_word(word: str) -> str:
+    code = word.upper()
+    for pattern, replacement in _PHONETIC_RULES:
+        code = pattern.sub(replacement, code)
+    return code or word[:1].upper()
+
+
+def phonetic_key(name: str) -> str:
+    """ Phonetic code of the first and last names (the middle names are often abbreviated or omitted). """
+    words = normalize_name(name).split()
+    if not words:
+        return ''
+    if len(words) == 1:
+        return phonetic_word(words[0])
+    return '%s %s' % (phonetic_word(words[0]), phonetic_word(words[-1]))
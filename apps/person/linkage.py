@@ -0,0 +1,93 @@
+from django.db.models import Q
+
+from apps.abstract.counters import reset_alive_count
+
+from .keys import normalize_name, phonetic_key
+from .models import Person
+
+
+def is_same_person(a, b) -> bool:
+    """
+    Decide if two persons of the same phonetic block are the same: same
+    birth date, or (a birth date unknown) same cep and normalized name. The
+    sex must not disagree.
+    """
+    if a.sex != b.sex and 'I' not in (a.sex, b.sex):
+        return False
+    if a.birth_date and b.birth_date:
+        return a.birth_date == b.birth_date
+    return bool(a.cep) and a.cep == b.cep and a.name_key == b.name_key
+
+
+class PersonIndex:
+    """ The persons of the blocks, by (phonetic_key, birth_date) and (phonetic_key, cep). """
+
+    def __init__(self, persons=()):
+        self.by_birth_date = {}
+        self.by_cep = {}
+        for person in persons:
+            self.add(person)
+
+    def add(self, person):
+        if person.birth_date:
+            self.by_birth_date.setdefault((person.phonetic_key, person.birth_date), []).append(person)
+        if person.cep:
+            self.by_cep.setdefault((person.phonetic_key, person.cep), []).append(person)
+
+    def find(self, person):
+        candidates = []
+        if person.birth_date:
+            candidates += self.by_birth_date.get((person.phonetic_key, person.birth_date), [])
+        if person.cep:
+            candidates += self.by_cep.get((person.phonetic_key, person.cep), [])
+        for candidate in candidates:
+            if is_same_person(candidate, person):
+                return candidate
+        return None
+
+
+def link_persons(rows, batch_size=None) -> list:
+    """
+    The Person id of each row (dicts with patient_name, birth_date, sex and
+    cep), matching the persons already registered in the same blocks and
+    creating the missing ones. One select and one insert for all the rows.
+    """
+    people = []
+    for row in rows:
+        name = row['patient_name']
+        people.append(Person(
+            name=name,
+            name_key=normalize_name(name)[:150],
+            phonetic_key=phonetic_key(name)[:64],
+            birth_date=row.get('birth_date'),
+            sex=row.get('sex', 'I'),
+            cep=row.get('cep', '')))
+
+    phonetic_keys = {person.phonetic_key for person in people}
+    birth_dates = {person.birth_date for person in people if person.birth_date}
+    ceps = {person.cep for person in people if person.cep}
+
+    # a range of the blocking indexes for each phonetic key
+    blocks = Q(birth_date__in=birth_dates) | Q(cep__in=ceps)
+    existing = Person.objects.filter(blocks, phonetic_key__in=phonetic_keys, duplicate_of=None).order_by('id')
+    index = PersonIndex(existing.only('id', 'name_key', 'phonetic_key', 'birth_date', 'sex', 'cep'))
+
+    matched, new_persons = [], []
+    for person in people:
+        found = index.find(person)
+        if found is None:
+            # the next rows of the same person match this one
+            index.add(person)
+            new_persons.append(person)
+            found = person
+        matched.append(found)
+
+    if new_persons:
+        Person.objects.bulk_create(new_persons, batch_size=batch_size)
+        # MySQL doesn't return the ids of a bulk insert, the uuids are known
+        ids = dict(Person.all_objects.filter(uuid__in=[person.uuid for person in new_persons]).values_list('uuid', 'id'))
+        for person in new_persons:
+            person.id = ids[person.uuid]
+        reset_alive_count(Person)
+
+    return [person.id for person in matched]
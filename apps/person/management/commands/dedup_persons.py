@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.person.dedup import run_dedup
+
+
+class Command(BaseCommand):
+    help = "Deduplica as pessoas cadastradas, agrupando os blocos (chave fonética + data de nascimento ou CEP) em lotes paralelos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help="Blocos por lote.")
+        parser.add_argument('--workers', type=int, default=None, help="Lotes processados em paralelo.")
+        parser.add_argument('--celery', action='store_true', help="Executa a deduplicação em uma task do celery.")
+
+    def handle(self, *args, **options):
+        if options['celery']:
+            from apps.person.celerytasks import dedup_persons
+            result = dedup_persons.delay(options['chunk_size'], options['workers'])
+            self.stdout.write("Deduplicação enviada ao celery: %s" % result.id)
+            return
+
+        found = run_dedup(options['chunk_size'], options['workers'], progress=self.report)
+        self.stdout.write(self.style.SUCCESS("Deduplicação finalizada: %d duplicatas encontradas." % found))
+
+    def report(self, field, done, chunks, found):
+        self.stdout.write("%s: lote %d de %d (%d duplicatas até agora)" % (field, done, chunks, found))
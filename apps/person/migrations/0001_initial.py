@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+import apps.abstract.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', apps.abstract.fields.BinaryUUIDField(default=apps.abstract.fields.uuid7, editable=False, unique=True)),
+                ('obs', models.TextField(blank=True, help_text='Observações de uso interno, não visível para os clientes.', max_length=500, null=True, verbose_name='Observações')),
+                ('enabled', models.BooleanField(default=True, help_text='Items não habilitados não serão visíveis aos clientes no site.', verbose_name='Habilitado')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora de quando o objeto foi registrado no sistema.', verbose_name='Data do cadastro')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora da última atualização feita no objeto no sistema.', verbose_name='Última atualização')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False, help_text='Items marcados como deletado não serão visíveis no sistema.', verbose_name='Deletado')),
+                ('name', models.CharField(max_length=150, verbose_name='Nome')),
+                ('birth_date', models.DateField(blank=True, null=True, verbose_name='Data de nascimento')),
+                ('sex', models.CharField(choices=[('M', 'Masculino'), ('F', 'Feminino'), ('I', 'Ignorado')], default='I', max_length=1, verbose_name='Sexo')),
+                ('cep', models.CharField(blank=True, max_length=8, verbose_name='CEP')),
+                ('name_key', models.CharField(editable=False, help_text='Nome sem acentos, pontuação e partículas (da, de, dos...).', max_length=150, verbose_name='Nome normalizado')),
+                ('phonetic_key', models.CharField(editable=False, help_text='Código fonético do primeiro e do último nome, agrupa as variações de grafia.', max_length=64, verbose_name='Chave fonética')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='created_by_%(class)s_related', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+                ('duplicate_of', models.ForeignKey(blank=True, help_text='Cadastro principal da pessoa, quando este é uma duplicata (deduplicação).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='person.person', verbose_name='Duplicata de')),
+            ],
+            options={
+                'verbose_name': 'Pessoa',
+                'verbose_name_plural': 'Pessoas',
+                'ordering': ['-created_at'],
+                'abstract': False,
+                'indexes': [
+                    models.Index(fields=['phonetic_key', 'birth_date'], name='person_phonetic_birth_idx'),
+                    models.Index(fields=['phonetic_key', 'cep'], name='person_phonetic_cep_idx'),
+                    models.Index(fields=['name_key'], name='person_name_key_idx'),
+                ],
+            },
+        ),
+    ]
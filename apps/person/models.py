@@ -1,3 +1,72 @@
 from django.db import models
 
-# Create your models here.
+from apps.abstract.models import AbstractModel
+
+from .keys import normalize_name, phonetic_key
+
+
+class Person(AbstractModel):
+    SEX_CHOICES = (
+        ('M', 'Masculino'),
+        ('F', 'Feminino'),
+        ('I', 'Ignorado'),
+    )
+
+    name = models.CharField(
+        max_length=150,
+        verbose_name="Nome")
+    birth_date = models.DateField(
+        verbose_name="Data de nascimento",
+        null=True,
+        blank=True)
+    sex = models.CharField(
+        max_length=1,
+        choices=SEX_CHOICES,
+        default='I',
+        verbose_name="Sexo")
+    cep = models.CharField(
+        max_length=8,
+        verbose_name="CEP",
+        blank=True)
+    name_key = models.CharField(
+        max_length=150,
+        editable=False,
+        verbose_name="Nome normalizado",
+        help_text="Nome sem acentos, pontuação e partículas (da, de, dos...).")
+    phonetic_key = models.CharField(
+        max_length=64,
+        editable=False,
+        verbose_name="Chave fonética",
+        help_text="Código fonético do primeiro e do último nome, agrupa as variações de grafia.")
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='duplicates',
+        verbose_name="Duplicata de",
+        help_text="Cadastro principal da pessoa, quando este é uma duplicata (deduplicação).",
+        null=True,
+        blank=True)
+
+    class Meta(AbstractModel.Meta):
+        verbose_name = 'Pessoa'
+        verbose_name_plural = 'Pessoas'
+        indexes = [
+            # blocking indexes of the record linkage (apps.person.linkage)
+            models.Index(fields=['phonetic_key', 'birth_date'], name='person_phonetic_birth_idx'),
+            models.Index(fields=['phonetic_key', 'cep'], name='person_phonetic_cep_idx'),
+            models.Index(fields=['name_key'], name='person_name_key_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def set_keys(self):
+        self.name_key = normalize_name(self.name)[:150]
+        self.phonetic_key = phonetic_key(self.name)[:64]
+
+    def save(self, *args, **kwargs):
+        self.set_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'name_key', 'phonetic_key'}
+        super(Person, self).save(*args, **kwargs)
@@ -1,3 +1,131 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from application.db.mysql_pool.pool import ConnectionPool, pool_capacity
+from apps.grievance.models import Grievance
+
+from . import dedup
+from .dedup import dedup_block, duplicate_blocks, run_dedup
+from .keys import normalize_name, phonetic_key
+from .linkage import link_persons
+from .models import Person
+
+
+class KeysTests(SimpleTestCase):
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("  Maria DA Conceição d'Ávila "), "maria conceicao d avila")
+        self.assertEqual(normalize_name(None), "")
+
+    def test_spelling_variants_share_the_key(self):
+        for a, b in (
+                ("Luiz Souza", "Luis Sousa"),
+                ("Thaís Oliveira", "Tais Olyveira"),
+                ("Felipe Lima", "Phelipe Lima"),
+                ("José dos Santos", "Jose Santos")):
+            with self.subTest(a=a, b=b):
+                self.assertEqual(phonetic_key(a), phonetic_key(b))
+
+    def test_middle_names_are_ignored(self):
+        self.assertEqual(phonetic_key("Maria Aparecida da Silva"), phonetic_key("Maria Silva"))
+
+    def test_different_names(self):
+        self.assertNotEqual(phonetic_key("José Santos"), phonetic_key("Jorge Santos"))
+        self.assertNotEqual(phonetic_key("Ana Costa"), phonetic_key("Ana Souza"))
+
+    def test_empty_name(self):
+        self.assertEqual(phonetic_key(""), "")
+
+
+class LinkageTests(TestCase):
+
+    def test_links_to_the_registered_person(self):
+        person = Person.objects.create(name="Luiz Souza", birth_date=date(1980, 1, 2), sex='M')
+        rows = [
+            {'patient_name': "Luis Sousa", 'birth_date': date(1980, 1, 2), 'sex': 'M', 'cep': ''},
+            {'patient_name': "Luis Sousa", 'birth_date': date(1990, 5, 6), 'sex': 'M', 'cep': ''},
+        ]
+        person_ids = link_persons(rows)
+        self.assertEqual(person_ids[0], person.pk)
+        self.assertNotEqual(person_ids[1], person.pk)
+        self.assertEqual(Person.objects.count(), 2)
+
+
+class DedupTests(TestCase):
+
+    def test_dedup_block_merges_the_duplicates(self):
+        birth_date = date(1975, 7, 8)
+        original = Person.objects.create(name="Thaís Oliveira", birth_date=birth_date, sex='F')
+        duplicate = Person.objects.create(name="Tais Olyveira", birth_date=birth_date, sex='I')
+        other = Person.objects.create(name="Thais Oliveira", birth_date=birth_date, sex='M')
+        grievance = Grievance.objects.create(
+            external_id='1', code='A90', notified_at=date(2024, 1, 1), patient_name=duplicate.name, person=duplicate)
+
+        blocks = duplicate_blocks('birth_date')
+        self.assertEqual(blocks, [(original.phonetic_key, birth_date)])
+
+        self.assertEqual(dedup_block('birth_date', *blocks[0]), 1)
+
+        duplicate.refresh_from_db()
+        other.refresh_from_db()
+        grievance.refresh_from_db()
+        self.assertEqual(duplicate.duplicate_of_id, original.pk)
+        self.assertIsNone(other.duplicate_of_id)
+        self.assertEqual(grievance.person_id, original.pk)
+
+        # the merged persons leave the blocks
+        self.assertEqual(duplicate_blocks('birth_date'), [(original.phonetic_key, birth_date)])
+        self.assertEqual(dedup_block('birth_date', *blocks[0]), 0)
+
+    def test_dedup_block_by_cep(self):
+        first = Person.objects.create(name="José Santos", cep='01001000')
+        second = Person.objects.create(name="Jose dos Santos", cep='01001000')
+
+        self.assertEqual(duplicate_blocks('cep'), [(first.phonetic_key, '01001000')])
+        self.assertEqual(dedup_block('cep', first.phonetic_key, '01001000'), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.duplicate_of_id, first.pk)
+
+
+class RunDedupTests(TransactionTestCase):
+
+    def test_threads_are_limited_by_the_pool(self):
+        for i in range(6):
+            birth_date = date(1970 + i, 1, 1)
+            Person.objects.create(name="José Santos", birth_date=birth_date)
+            Person.objects.create(name="Jose dos Santos", birth_date=birth_date)
+
+        # a pool of 2 connections (a single thread at a time, sqlite doesn't
+        # take concurrent writes), one is taken by the main thread (the
+        # progress of the task)
+        pool = ConnectionPool('default', size=1, max_overflow=1, timeout=0.5)
+        main_connection = pool.checkout(object)
+        dedup_blocks = dedup.dedup_blocks
+
+        def pooled(field, blocks):
+            connection = pool.checkout(object)
+            try:
+                return dedup_blocks(field, blocks)
+            finally:
+                pool.checkin(connection)
+
+        with mock.patch.object(dedup, 'pool_capacity', return_value=pool.max_connections), \
+                mock.patch.object(dedup, 'dedup_blocks', pooled):
+            self.assertEqual(run_dedup(chunk_size=1, workers=8), 6)
+        pool.checkin(main_connection)
+
+        # no checkout timed out (PoolTimeout)
+        self.assertEqual(pool.stats()['checkouts'], 7)
+        self.assertEqual(Person.objects.filter(duplicate_of=None).count(), 6)
+
+    def test_max_workers(self):
+        with mock.patch.object(dedup, 'pool_capacity', return_value=3):
+            self.assertEqual(dedup.max_workers(4), 2)
+            self.assertEqual(dedup.max_workers(1), 1)
+        with mock.patch.object(dedup, 'pool_capacity', return_value=1):
+            self.assertEqual(dedup.max_workers(4), 1)
+        # not pooled
+        self.assertIsNone(pool_capacity())
+        self.assertEqual(dedup.max_workers(4), 4)
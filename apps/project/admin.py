@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.abstract.admin import AbstractModelAdmin
+
+from .models import Project
+
+
+@admin.register(Project)
+class ProjectAdmin(AbstractModelAdmin):
+    list_display = ('name', 'code', 'enabled')
+    search_fields = ('name', '=code')
+    readonly_fields = ('uuid', 'created_at', 'updated_at')
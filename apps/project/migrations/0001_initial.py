@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+import apps.abstract.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', apps.abstract.fields.BinaryUUIDField(default=apps.abstract.fields.uuid7, editable=False, unique=True)),
+                ('obs', models.TextField(blank=True, help_text='Observações de uso interno, não visível para os clientes.', max_length=500, null=True, verbose_name='Observações')),
+                ('enabled', models.BooleanField(default=True, help_text='Items não habilitados não serão visíveis aos clientes no site.', verbose_name='Habilitado')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora de quando o objeto foi registrado no sistema.', verbose_name='Data do cadastro')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Data e hora da última atualização feita no objeto no sistema.', verbose_name='Última atualização')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False, help_text='Items marcados como deletado não serão visíveis no sistema.', verbose_name='Deletado')),
+                ('name', models.CharField(max_length=150, verbose_name='Nome')),
+                ('code', models.CharField(help_text='Código do projeto nos arquivos de notificação importados.', max_length=32, unique=True, verbose_name='Código')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='created_by_%(class)s_related', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+            ],
+            options={
+                'verbose_name': 'Projeto',
+                'verbose_name_plural': 'Projetos',
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+    ]
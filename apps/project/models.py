@@ -1,3 +1,21 @@
 from django.db import models
 
-# Create your models here.
+from apps.abstract.models import AbstractModel
+
+
+class Project(AbstractModel):
+    name = models.CharField(
+        max_length=150,
+        verbose_name="Nome")
+    code = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name="Código",
+        help_text="Código do projeto nos arquivos de notificação importados.")
+
+    class Meta(AbstractModel.Meta):
+        verbose_name = 'Projeto'
+        verbose_name_plural = 'Projetos'
+
+    def __str__(self):
+        return self.name
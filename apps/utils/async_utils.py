@@ -0,0 +1,133 @@
+import asyncio
+from functools import wraps
+import os
+import re
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+import httpx
+
+from .utils import can_call_celery, log_message
+
+
+# Async versions of the I/O bound helpers of apps.utils.utils, used by the
+# async views served through application.asgi. The http calls share one
+# pooled httpx.AsyncClient per event loop, so a process can keep many slow
+# upstream requests in flight without holding a thread for each one.
+# Under WSGI each async view runs in a new loop (async_to_sync), so the views
+# close their client at the end (closes_http_client).
+
+_clients = WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=settings.ASYNC_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ASYNC_HTTP_MAX_KEEPALIVE),
+            follow_redirects=True)
+        _clients[loop] = client
+    return client
+
+
+async def close_http_client():
+    """ Close the client of the running loop (a loop created for a single batch of calls). """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def closes_http_client(view):
+    """ Close the client of the loop at the end of an async view served by WSGI. """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        finally:
+            # under ASGI the loop (and its client) lives as long as the server
+            if not isinstance(request, ASGIRequest):
+                await close_http_client()
+    return wrapper
+
+
+async def close_http_clients():
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
+
+
+async def aconsulta_cep(cep):
+    headers = {
+        "Accept": "application/json",
+        "Content-Type": "application/json"}
+
+    try:
+        url = "https://viacep.com.br/ws/{}/json/".format(re.sub("[^0-9]", "", cep))
+        request_response = await get_http_client().get(url, headers=headers)
+        endereco = request_response.json()
+
+        return {
+            "logradouro": endereco["logradouro"],
+            "bairro": endereco["bairro"],
+            "cidade": endereco["localidade"],
+            "uf": endereco["uf"]}
+    except (httpx.HTTPError, ValueError, KeyError):
+        # not a bare except: a cancellation (asyncio.CancelledError) must
+        # not become an empty address
+        return {
+            "logradouro": "",
+            "bairro": "",
+            "cidade": "",
+            "uf": ""}
+
+
+def _write_chunks(destination_file_name, chunks, mode='ab'):
+    with open(destination_file_name, mode) as f:
+        f.writelines(chunks)
+
+
+async def adownload_file(file_url, destination_file_name):
+    try:
+        path = os.path.dirname(destination_file_name)
+        await sync_to_async(os.makedirs, thread_sensitive=False)(path, exist_ok=True)
+
+        # a single request streamed to the file (the sync version requests
+        # the url twice and loads the whole file in memory)
+        async with get_http_client().stream('GET', file_url) as response:
+            if response.status_code == 404:
+                raise Exception("Arquivo não disponível para a url: {}. O servidor remoto retornou o status 404.".format(file_url))
+            response.raise_for_status()
+
+            await sync_to_async(_write_chunks, thread_sensitive=False)(destination_file_name, [], 'wb')
+            chunks = []
+            async for chunk in response.aiter_bytes(64 * 1024):
+                chunks.append(chunk)
+                if len(chunks) == 16:
+                    await sync_to_async(_write_chunks, thread_sensitive=False)(destination_file_name, chunks)
+                    chunks = []
+            if chunks:
+                await sync_to_async(_write_chunks, thread_sensitive=False)(destination_file_name, chunks)
+
+        return os.path.getsize(destination_file_name) > 0
+    except Exception as e:
+        log_message([
+            "Erro ao tentar fazer o download do documento a seguir:",
+            "destination_file_name: %s" % (destination_file_name),
+            "file_url: %s" % (file_url),
+            str(e)
+        ])
+
+        return False
+
+
+async def acan_call_celery(who_requesting: str):
+    # kombu has no async api, the broker check runs in the thread pool
+    # (thread_sensitive=False, so it doesn't wait for the main sync thread)
+    return await sync_to_async(can_call_celery, thread_sensitive=False)(who_requesting)
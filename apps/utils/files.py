@@ -0,0 +1,125 @@
+from functools import lru_cache
+import mimetypes
+from pathlib import Path
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+def accepted_encodings(header: str) -> set:
+    """ The content codings of an Accept-Encoding header with a q-value above 0. """
+    qvalues = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+
+    accepted = {coding for coding, q in qvalues.items() if q > 0 and coding != '*'}
+    # '*' covers the codings not listed
+    if qvalues.get('*', 0) > 0:
+        accepted |= {coding for coding in ('br', 'gzip') if coding not in qvalues}
+    return accepted
+
+
+def serve_file(request, path, document_root, max_age=0, immutable=False, accel_redirect_prefix=None):
+    """
+    Serve a file of document_root with conditional GET (Last-Modified), the
+    precompressed .br/.gz copy when the client accepts it and Cache-Control.
+
+    With accel_redirect_prefix (a front nginx with an internal location for
+    the document_root) the response only carries the X-Accel-Redirect header.
+    Otherwise it's a FileResponse, which gunicorn sends with sendfile()
+    (zero-copy) through wsgi.file_wrapper.
+    """
+    try:
+        fullpath = Path(safe_join(document_root, path))
+    except SuspiciousFileOperation:
+        raise Http404("Arquivo não encontrado.")
+
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Arquivo não encontrado.")
+    if not fullpath.is_file():
+        raise Http404("Arquivo não encontrado.")
+
+    if not was_modified_since(header=request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime=stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+
+    serve_path, content_encoding = fullpath, encoding
+    if encoding is None:
+        accepted_codings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for accepted, ext in (('br', '.br'), ('gzip', '.gz')):
+            candidate = Path(str(fullpath) + ext)
+            if accepted in accepted_codings and candidate.is_file():
+                serve_path, content_encoding = candidate, accepted
+                break
+
+    if accel_redirect_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_redirect_prefix + str(serve_path.relative_to(document_root))
+    else:
+        response = FileResponse(serve_path.open('rb'), content_type=content_type, filename=fullpath.name)
+
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+
+    if max_age:
+        # patch_cache_control writes immutable=False as is
+        directives = {'immutable': True} if immutable else {}
+        patch_cache_control(response, public=True, max_age=max_age, **directives)
+
+    return response
+
+
+@lru_cache(maxsize=1)
+def hashed_static_names() -> frozenset:
+    """ The hashed names of the manifest (loaded once per process, as the storage does). """
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def serve_static(request, path):
+    # the hashed names (CompressedManifestStaticFilesStorage) are cached
+    # forever, the original names are kept too (TinyMCE loads its plugins
+    # and skins by them) and change on a deploy
+    if path in hashed_static_names():
+        return serve_file(request, path, settings.STATIC_ROOT, max_age=60 * 60 * 24 * 365, immutable=True)
+    return serve_file(request, path, settings.STATIC_ROOT, max_age=settings.ASSETS_CACHE_MAX_AGE)
+
+
+def serve_media(request, path):
+    return serve_file(
+        request, path, settings.MEDIA_ROOT,
+        max_age=settings.ASSETS_CACHE_MAX_AGE,
+        accel_redirect_prefix=settings.MEDIA_ACCEL_REDIRECT_PREFIX)
+
+
+def file_patterns(prefix, view):
+    """ Like django.conf.urls.static.static, but not limited to DEBUG. """
+    if not prefix or urlsplit(prefix).netloc:
+        return []
+    return [re_path(r'^%s(?P<path>.*)$' % re.escape(prefix.lstrip('/')), view)]
@@ -0,0 +1,217 @@
+import atexit
+from datetime import datetime
+import fcntl
+import glob
+import gzip
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+
+
+_ROTATED_STAMP = re.compile(r'^\d{8}-\d{6}(-\d+)?$')
+
+
+class LogSink:
+    """
+    Append-only, non-blocking log writer.
+
+    write() only puts the line in a queue. A single background thread drains
+    the queue in batches, keeps one open file handle per destination, flushes
+    once per batch and rotates the files by size or age.
+
+    Several processes (gunicorn and celery workers) append to the same files:
+    only the process holding the <file>.lock flock rotates a file, the others
+    reopen it when its inode changes, and a rotated file is gzip compressed
+    at the next rotation, when no process writes to it anymore.
+
+    The sink is reset in the child after a fork (gunicorn preload, celery
+    prefork), the queue, the handles and the thread belong to the parent.
+    """
+
+    def __init__(self, max_bytes=10 * 1024 * 1024, rotate_interval=24 * 60 * 60, flush_interval=1.0, batch_size=1000):
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._pid = None
+        self._files = {}
+
+    def write(self, path: str, content: str, wait=False):
+        """ Queue the content, wait=True blocks until it is written. """
+        self._ensure_thread()
+        self._queue.put((path, content))
+        if wait:
+            self.flush()
+
+    def flush(self, timeout=5.0):
+        """ Block until every line queued before this call is written. """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='log-sink', daemon=True)
+            self._thread.start()
+
+    def _after_fork(self):
+        # the parent's thread doesn't exist in the child (and the lock may be
+        # held by it), the handles are closed by the parent
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        touched = set()
+        waiters = []
+
+        for path, content in batch:
+            if path is None:
+                waiters.append(content)
+                continue
+            try:
+                self._get_file(path, reopen=path not in touched)[0].write(content)
+                touched.add(path)
+            except OSError as e:
+                sys.stderr.write("log-sink: falha ao gravar em %s: %s\n" % (path, e))
+
+        for path in touched:
+            f, opened_at = self._files[path]
+            try:
+                f.flush()
+                if f.tell() >= self.max_bytes or time.time() - opened_at >= self.rotate_interval:
+                    self._rotate(path)
+            except OSError as e:
+                sys.stderr.write("log-sink: falha ao rotacionar %s: %s\n" % (path, e))
+
+        for waiter in waiters:
+            waiter.set()
+
+    def _close_file(self, path):
+        entry = self._files.pop(path, None)
+        if entry is not None:
+            entry[0].close()
+
+    def _get_file(self, path, reopen=False):
+        entry = self._files.get(path)
+        if entry is not None and reopen:
+            # another process rotated (or removed) the file
+            try:
+                moved = os.stat(path).st_ino != os.fstat(entry[0].fileno()).st_ino
+            except FileNotFoundError:
+                moved = True
+            if moved:
+                self._close_file(path)
+                entry = None
+
+        if entry is None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            entry = (open(path, 'a', encoding='utf8'), time.time())
+            self._files[path] = entry
+        return entry
+
+    def _rotate(self, path):
+        with open(path + '.lock', 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # another process is rotating it
+                return
+
+            f, _ = self._files[path]
+            try:
+                if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                    # already rotated by another process
+                    self._close_file(path)
+                    return
+            except FileNotFoundError:
+                self._close_file(path)
+                return
+
+            self._close_file(path)
+            if os.path.getsize(path) == 0:
+                return
+
+            # the previous rotations aren't written to anymore
+            self._compress_rotated(path)
+
+            base, ext = os.path.splitext(path)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            rotated = "%s.%s%s" % (base, stamp, ext)
+
+            # more than one rotation in the same second
+            counter = 1
+            while os.path.exists(rotated) or os.path.exists(rotated + '.gz'):
+                rotated = "%s.%s-%d%s" % (base, stamp, counter, ext)
+                counter += 1
+
+            os.replace(path, rotated)
+
+    def _compress_rotated(self, path):
+        base, ext = os.path.splitext(path)
+        for rotated in glob.glob("%s.[0-9]*%s" % (glob.escape(base), glob.escape(ext))):
+            if not _ROTATED_STAMP.match(rotated[len(base) + 1:len(rotated) - len(ext)]):
+                continue
+            with open(rotated, 'rb') as src, gzip.open(rotated + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+    def close(self):
+        self.flush()
+        for f, _ in self._files.values():
+            f.close()
+        self._files = {}
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_log_sink() -> LogSink:
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                from django.conf import settings
+
+                _sink = LogSink(
+                    max_bytes=settings.LOG_SINK_MAX_BYTES,
+                    rotate_interval=settings.LOG_SINK_ROTATE_INTERVAL,
+                    flush_interval=settings.LOG_SINK_FLUSH_INTERVAL)
+                atexit.register(_sink.close)
+                os.register_at_fork(after_in_child=_sink._after_fork)
+    return _sink
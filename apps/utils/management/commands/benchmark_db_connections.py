@@ -0,0 +1,38 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from application.db.mysql_pool.base import DatabaseWrapper as PooledDatabaseWrapper
+
+
+class Command(BaseCommand):
+    help = "Compara o custo de conexão por requisição (conectar, SELECT 1, fechar) sem e com o pool de conexões."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        settings_dict = dict(connections[options['database']].settings_dict)
+        settings_dict['CONN_MAX_AGE'] = 0
+
+        for label, wrapper_class in (('sem pool', MySQLDatabaseWrapper), ('pool', PooledDatabaseWrapper)):
+            connection = wrapper_class(dict(settings_dict), alias='benchmark')
+            timings = []
+
+            for _ in range(options['requests']):
+                start = perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.close()
+                timings.append((perf_counter() - start) * 1000)
+
+            timings.sort()
+            self.stdout.write("%s: avg %.2fms / p99 %.2fms por requisição" % (
+                label, sum(timings) / len(timings), timings[int(len(timings) * 0.99)]))
+
+            if wrapper_class is PooledDatabaseWrapper:
+                from application.db.mysql_pool.pool import pool_stats
+                self.stdout.write("  %s" % pool_stats().get('benchmark'))
@@ -0,0 +1,56 @@
+import logging
+import os
+import tempfile
+import threading
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from application.log import JSONFormatter, QueueFileHandler
+
+
+class Command(BaseCommand):
+    help = "Compara a latência das chamadas de log (várias threads simulando requisições) com FileHandler e QueueFileHandler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--calls', type=int, default=5000, help="Chamadas de log por thread.")
+
+    def handle(self, *args, **options):
+        threads, calls = options['threads'], options['calls']
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            handlers = (
+                logging.FileHandler(os.path.join(tmp_dir, 'sync.log')),
+                QueueFileHandler(os.path.join(tmp_dir, 'queue.log')),
+            )
+
+            for handler in handlers:
+                handler.setFormatter(JSONFormatter())
+                logger = logging.getLogger('benchmark.%s' % handler.__class__.__name__)
+                logger.propagate = False
+                logger.setLevel(logging.DEBUG)
+                logger.addHandler(handler)
+
+                timings = []
+
+                def request_thread():
+                    for i in range(calls):
+                        start = perf_counter()
+                        logger.debug("SELECT * FROM grievance WHERE id = %s", i)
+                        timings.append(perf_counter() - start)
+
+                workers = [threading.Thread(target=request_thread) for _ in range(threads)]
+                for w in workers:
+                    w.start()
+                for w in workers:
+                    w.join()
+
+                logger.removeHandler(handler)
+                handler.close()
+
+                timings.sort()
+                self.stdout.write("%s: avg %.1fus / p99 %.1fus por chamada" % (
+                    handler.__class__.__name__,
+                    sum(timings) / len(timings) * 1e6,
+                    timings[int(len(timings) * 0.99)] * 1e6))
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+import requests
+
+
+class Command(BaseCommand):
+    help = "Mede a vazão (requisições/s e MB/s) de um arquivo de mídia servido por uma instância em execução."
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Url completa do arquivo, ex: http://127.0.0.1:8000/media/assets/logo.png")
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--encoding', default='identity', help="Valor do header Accept-Encoding.")
+
+    def handle(self, *args, **options):
+        url, total = options['url'], options['requests']
+        headers = {'Accept-Encoding': options['encoding']}
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=options['concurrency'], pool_maxsize=options['concurrency'])
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        def fetch(_):
+            response = session.get(url, headers=headers, stream=True)
+            size = sum(len(chunk) for chunk in response.iter_content(64 * 1024))
+            if response.status_code != 200:
+                raise CommandError("Status %d para %s" % (response.status_code, url))
+            return size
+
+        start = perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            sizes = list(executor.map(fetch, range(total)))
+        elapsed = perf_counter() - start
+
+        self.stdout.write("%d requisições em %.2fs: %.0f req/s, %.1f MB/s" % (
+            total, elapsed, total / elapsed, sum(sizes) / elapsed / 1024 / 1024))
@@ -0,0 +1,49 @@
+from decimal import Decimal
+from time import perf_counter
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from apps.utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = "Compara o tempo de serialização de uma resposta de listagem grande com o JSONRenderer do DRF e o ORJSONRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        now = timezone.now()
+
+        # the same shape of a paginated AbstractModel list response
+        data = {
+            'next': None,
+            'previous': None,
+            'results': [
+                {
+                    'id': i,
+                    'uuid': uuid.uuid4(),
+                    'obs': "Observação de uso interno %d" % i,
+                    'enabled': True,
+                    'created_at': now,
+                    'updated_at': now,
+                    'value': Decimal('1234.56'),
+                }
+                for i in range(rows)
+            ],
+        }
+
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                content = renderer.render(data, 'application/json')
+                timings.append((perf_counter() - start) * 1000)
+            self.stdout.write("%s (%d rows, %d bytes): min %.2fms / avg %.2fms" % (
+                renderer.__class__.__name__, rows, len(content), min(timings), sum(timings) / repeat))
@@ -0,0 +1,32 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from application.db.routers import read_from_replica
+from apps.utils.serialization import get_model_serializer
+
+
+class Command(BaseCommand):
+    help = "Exporta os registros de um model para um arquivo json, lendo o banco em lotes (memória constante)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Model no formato app_label.ModelName.")
+        parser.add_argument('output', help="Caminho do arquivo json de saída.")
+        parser.add_argument('--fields', nargs='+', default=None)
+        parser.add_argument('--exclude', nargs='+', default=None)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--all', action='store_true', help="Inclui os registros deletados (soft delete).")
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+        manager = getattr(model, 'all_objects', model._default_manager) if options['all'] else model._default_manager
+        serializer = get_model_serializer(model, options['fields'], options['exclude'])
+
+        with read_from_replica(), open(options['output'], 'wb') as f:
+            for chunk in serializer.stream_json(manager.all(), options['chunk_size']):
+                f.write(chunk)
+
+        self.stdout.write("Exportação finalizada: %s" % options['output'])
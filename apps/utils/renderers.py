@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+import orjson
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+from .serialization import json_default
+
+
+def orjson_default(obj):
+    """
+    Same conversions of apps.utils.serialization.json_default, except for
+    decimals, which follow the COERCE_DECIMAL_TO_STRING api setting.
+    """
+    if isinstance(obj, Decimal):
+        return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+    if hasattr(obj, 'tolist'):
+        # numpy scalars not covered by OPT_SERIALIZE_NUMPY
+        return obj.tolist()
+    return json_default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in replacement of rest_framework.renderers.JSONRenderer built on
+    orjson, which serializes large list responses several times faster than
+    the stdlib json module.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = self.options
+        if accepted_media_type and 'indent' in accepted_media_type:
+            # orjson only supports two spaces indentation
+            options |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(data, default=orjson_default, option=options)
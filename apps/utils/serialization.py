@@ -0,0 +1,221 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from uuid import UUID
+
+from django.core.files import File
+from django.db.models import Model
+from django.db.models.fields.files import FieldFile
+from django.db.models.query import QuerySet
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+
+import orjson
+
+
+# Single pass json serialization built on orjson. The types that orjson
+# doesn't serialize natively (it already handles str, int, float, bool, None,
+# dict, list, tuple, UUID, datetime, date, time, dataclasses and numpy) are
+# converted by the handlers registered in the table below, resolved once per
+# type through its MRO.
+
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+_json_handlers = {}
+_resolved_handlers = {}
+
+
+def register_json_handler(*types):
+    """
+    Register a function that converts instances of the given types (and its
+    subclasses) to something orjson can serialize.
+
+    >>> @register_json_handler(Decimal)
+    ... def decimal_to_str(value):
+    ...     return str(value)
+    """
+    def decorator(func):
+        for klass in types:
+            _json_handlers[klass] = func
+        _resolved_handlers.clear()
+        return func
+    return decorator
+
+
+def json_default(obj):
+    klass = type(obj)
+    try:
+        handler = _resolved_handlers[klass]
+    except KeyError:
+        handler = next((_json_handlers[k] for k in klass.__mro__ if k in _json_handlers), None)
+        _resolved_handlers[klass] = handler
+
+    if handler is None:
+        raise TypeError("Type is not JSON serializable: %s" % klass.__name__)
+    return handler(obj)
+
+
+def stdlib_json_default(obj):
+    """ json_default for json.dumps, which doesn't serialize what orjson handles natively. """
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    return json_default(obj)
+
+
+@register_json_handler(Model)
+def _model_handler(instance):
+    return get_model_serializer(instance.__class__)(instance)
+
+
+@register_json_handler(QuerySet, set, frozenset)
+def _iterable_handler(value):
+    return list(value)
+
+
+@register_json_handler(Decimal, Promise)
+def _str_handler(value):
+    return str(value)
+
+
+@register_json_handler(FieldFile, File)
+def _file_handler(value):
+    return value.name or None
+
+
+@register_json_handler(timedelta)
+def _timedelta_handler(value):
+    return duration_iso_string(value)
+
+
+@register_json_handler(bytes, bytearray, memoryview)
+def _bytes_handler(value):
+    return bytes(value).decode('utf-8', 'replace')
+
+
+def dumps_json(data, option=JSON_OPTIONS) -> bytes:
+    return orjson.dumps(data, default=json_default, option=option)
+
+
+def stream_json(items, chunk_size=500, option=JSON_OPTIONS):
+    """
+    Serialize an iterable (a queryset iterator, a generator...) as a json
+    array, yielding one bytes chunk per chunk_size items. Only one chunk is
+    held in memory at a time, so it can feed a requests.post(data=...) call
+    (chunked transfer) or a log file without building the whole payload.
+    """
+    yield b'['
+
+    buffer = []
+    first = True
+    for item in items:
+        buffer.append(orjson.dumps(item, default=json_default, option=option))
+        if len(buffer) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(buffer)
+            buffer = []
+            first = False
+
+    if buffer:
+        yield (b'' if first else b',') + b','.join(buffer)
+
+    yield b']'
+
+
+def write_json(fp, items, chunk_size=500, option=JSON_OPTIONS):
+    """ Write the iterable as a json array to a binary file object. """
+    for chunk in stream_json(items, chunk_size, option):
+        fp.write(chunk)
+
+
+class ModelSerializer:
+    """
+    Convert model instances (or rows of values_list) to dicts keyed by the
+    field attname. The list of fields is resolved once per (model, include,
+    exclude) by get_model_serializer, so serializing a row is an attrgetter
+    call and a zip.
+    """
+
+    def __init__(self, model, attnames):
+        self.model = model
+        self.attnames = attnames
+        self._getter = attrgetter(*attnames) if attnames else None
+
+    def __call__(self, instance) -> dict:
+        if self._getter is None:
+            return {}
+        values = self._getter(instance)
+        if len(self.attnames) == 1:
+            values = (values,)
+        return dict(zip(self.attnames, values))
+
+    def from_values(self, row) -> dict:
+        return dict(zip(self.attnames, row))
+
+    def values_list(self, queryset):
+        return queryset.values_list(*self.attnames)
+
+    def iter_dicts(self, queryset, chunk_size=2000, keyset=True):
+        """
+        Yield one dict per row of the queryset without building model
+        instances, holding at most chunk_size rows in memory.
+
+        With keyset=True (the default) the rows are read in primary key
+        order with one `pk > last_pk` query per chunk. This keeps the memory
+        constant on MySQL too, where QuerySet.iterator() can't use a server
+        side cursor and the driver fetches the whole result set. With
+        keyset=False the queryset order is kept and the rows are read from
+        QuerySet.iterator(chunk_size=chunk_size).
+        """
+        attnames = self.attnames
+
+        if not keyset:
+            for row in self.values_list(queryset).iterator(chunk_size=chunk_size):
+                yield dict(zip(attnames, row))
+            return
+
+        pk_name = self.model._meta.pk.attname
+        fields = attnames if pk_name in attnames else attnames + (pk_name,)
+        pk_index = fields.index(pk_name)
+        queryset = queryset.order_by(pk_name)
+        last_pk = None
+
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(chunk.values_list(*fields)[:chunk_size])
+            if not rows:
+                return
+
+            for row in rows:
+                yield dict(zip(attnames, row))
+
+            last_pk = rows[-1][pk_index]
+            if len(rows) < chunk_size:
+                return
+
+    def stream_json(self, queryset, chunk_size=2000, keyset=True, option=JSON_OPTIONS):
+        """ The rows of the queryset as json array chunks (see stream_json). """
+        return stream_json(self.iter_dicts(queryset, chunk_size, keyset), chunk_size, option)
+
+
+def _freeze(names):
+    return frozenset(names) if names is not None else None
+
+
+@lru_cache(maxsize=None)
+def _compile_model_serializer(model, include, exclude):
+    fields = model._meta.concrete_fields
+    if include is not None:
+        fields = [f for f in fields if f.name in include]
+    elif exclude is not None:
+        fields = [f for f in fields if f.name not in exclude]
+    return ModelSerializer(model, tuple(f.attname for f in fields))
+
+
+def get_model_serializer(model, include=None, exclude=None) -> ModelSerializer:
+    """
+    Return the (cached) serializer of the model. Like model_to_dict, include
+    has precedence over exclude and both are lists of field names.
+    """
+    return _compile_model_serializer(model, _freeze(include), _freeze(exclude))
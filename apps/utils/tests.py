@@ -1,3 +1,105 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.test import RequestFactory, SimpleTestCase, override_settings
+import httpx
+
+from .async_utils import _clients, aconsulta_cep
+from .files import accepted_encodings, hashed_static_names, serve_static
+
+
+EMPTY_ADDRESS = {"logradouro": "", "bairro": "", "cidade": "", "uf": ""}
+
+
+def run_with_transport(handler, coroutine):
+    """ Run the coroutine with the http client of its loop answered by the handler. """
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        _clients[asyncio.get_running_loop()] = client
+        try:
+            return await coroutine()
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+class ConsultaCepTests(SimpleTestCase):
+
+    def test_address(self):
+        def handler(request):
+            return httpx.Response(200, json={"logradouro": "Praça da Sé", "bairro": "Sé", "localidade": "São Paulo", "uf": "SP"})
+
+        address = run_with_transport(handler, lambda: aconsulta_cep("01001-000"))
+        self.assertEqual(address, {"logradouro": "Praça da Sé", "bairro": "Sé", "cidade": "São Paulo", "uf": "SP"})
+
+    def test_failed_lookup_is_an_empty_address(self):
+        def unreachable(request):
+            raise httpx.ConnectError("unreachable", request=request)
+
+        for handler in (unreachable, lambda request: httpx.Response(200, json={"erro": True}), lambda request: httpx.Response(502, text="<html>")):
+            with self.subTest(handler=handler):
+                self.assertEqual(run_with_transport(handler, lambda: aconsulta_cep("01001000")), EMPTY_ADDRESS)
+
+    def test_cancellation_is_not_swallowed(self):
+        async def slow(request):
+            await asyncio.sleep(10)
+
+        async def cancelled_lookup():
+            task = asyncio.ensure_future(aconsulta_cep("01001000"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            return await task
+
+        with self.assertRaises(asyncio.CancelledError):
+            run_with_transport(slow, cancelled_lookup)
+
+
+class ServeStaticTests(SimpleTestCase):
+
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+
+        files = {
+            'css/app.css': 'body {}',
+            'css/app.0123456789ab.css': 'body {}',
+            'css/app.0123456789ab.css.gz': 'gzip',
+            'staticfiles.json': json.dumps({'version': '1.1', 'paths': {'css/app.css': 'css/app.0123456789ab.css'}}),
+        }
+        for name, content in files.items():
+            path = os.path.join(self.static_root.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(content)
+
+        settings = override_settings(
+            STATIC_ROOT=self.static_root.name,
+            ASSETS_CACHE_MAX_AGE=3600,
+            STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'}})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        hashed_static_names.cache_clear()
+        self.addCleanup(hashed_static_names.cache_clear)
+
+    def get(self, path, accept_encoding=''):
+        response = serve_static(RequestFactory().get('/static/' + path, HTTP_ACCEPT_ENCODING=accept_encoding), path)
+        if hasattr(response, 'close'):
+            response.close()
+        return response
+
+    def test_only_the_hashed_names_are_immutable(self):
+        self.assertEqual(self.get('css/app.0123456789ab.css')['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(self.get('css/app.css')['Cache-Control'], 'public, max-age=3600')
+
+    def test_precompressed_copy(self):
+        self.assertEqual(self.get('css/app.0123456789ab.css', 'gzip, deflate')['Content-Encoding'], 'gzip')
+        self.assertFalse(self.get('css/app.0123456789ab.css', 'gzip;q=0, deflate').has_header('Content-Encoding'))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br;q=0.5'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('gzip;q=0, br;q=0.0'), set())
+        self.assertEqual(accepted_encodings('GZIP;Q=1'), {'gzip'})
+        self.assertEqual(accepted_encodings('*;q=0.1, br;q=0'), {'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
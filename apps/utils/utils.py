@@ -8,7 +8,6 @@ import locale
 import json
 from mimetypes import MimeTypes
 import os
-import orjson
 import re
 import string
 import subprocess
@@ -17,7 +16,6 @@ import random
 import requests
 import traceback
 from typing import Optional
-from uuid import UUID
 import urllib
 import urllib.request
 
@@ -30,11 +28,13 @@ from django.template import loader
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-import config.models as config_models
-from config.utils import get_setting
+from apps.config.utils import get_setting
 
 from application.celery import app
 
+from .logsink import get_log_sink
+from .serialization import get_model_serializer, stdlib_json_default
+
 
 def is_time_in_period(start_time, end_time, now_time):
     if start_time < end_time:
@@ -76,8 +76,7 @@ def is_now_work_time(start_hour=7, start_min=45, end_hour=17, end_min=0, week_ma
 
 
 def get_current_site_url(append_path=None, uses_admin=True):
-    site = config_models.Site.objects.get(pk=1)
-    base_url = site.url_admin if uses_admin else site.url_site
+    base_url = (settings.SITE_ADMIN_URL if uses_admin else settings.SITE_URL).rstrip('/')
 
     if append_path is not None:
         return "%s/%s/" % (base_url, append_path)
@@ -161,27 +160,15 @@ def strfy_json(data) -> str:
     if isinstance(data, str):
         return data
 
+    # mappings, querydicts and lists of pairs are stored as a plain dict
     try:
-        data_dict = dict(data)
-    except:
-        data_dict = data
+        data = dict(data)
+    except (TypeError, ValueError):
+        pass
 
-    # other option
-    """
-    safe_dict = {}
-    for k, v in data_dict.items():
-        for g, h in v.items():
-            safe_dict[safe_str(g)] = safe_str(h)
-    return str(json.dumps(safe_dict, ensure_ascii=False))
-    """
-
-    try:
-        return str(json.dumps(data_dict, ensure_ascii=False))
-    except:
-        try:
-            return json.dumps(data_dict, ensure_ascii=False).encode('ascii', 'ignore').decode('ascii')
-        except:
-            return str(orjson.dumps(data_dict, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY))
+    # a single json.dumps (the stored text keeps its separators), the
+    # project types are converted by the handlers of dumps_json
+    return json.dumps(data, ensure_ascii=False, default=stdlib_json_default)
 
 
 def get_time_threshold(days: int):
@@ -337,15 +324,13 @@ def can_call_celery(who_requesting: str):
 
 
 def default_render_template_email(append_template_path, message_args, site=None):
-    if site is None:
-        site = config_models.Site.objects.get(pk=1)
-
+    # the site data comes from the settings (SITE_*) unless a site is given
     email_params = {
         # "logo_url": site.logomarca,
         "logo_url": "https://res.cloudinary.com/realizadigital/image/upload/v1650676220/logomarcas/logomarca-realiza-100px_b8xofv.png",
-        "site_url": site.url_site,
-        "site_name": site.name_site,
-        "realiza_address": site.endereco,
+        "site_url": site.url_site if site is not None else settings.SITE_URL,
+        "site_name": site.name_site if site is not None else settings.SITE_NAME,
+        "realiza_address": site.endereco if site is not None else settings.SITE_ADDRESS,
         "current_year": datetime.today().year,
     }
 
@@ -414,14 +399,17 @@ def create_sha256_signature(key: str, message: str):
     return signature
 
 
-def is_valid_uuid(uuid_to_test, version=4):
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-([0-9a-f])[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}')
+
+
+def is_valid_uuid(uuid_to_test, version=None):
     """
-    Check if uuid_to_test is a valid UUID.
+    Check if uuid_to_test is a valid UUID (in the canonical lowercase form).
 
      Parameters
     ----------
     uuid_to_test : str
-    version : {1, 2, 3, 4}
+    version : {1, 2, 3, 4, 5, 6, 7, None}, None accepts any version
 
      Returns
     -------
@@ -435,11 +423,11 @@ def is_valid_uuid(uuid_to_test, version=4):
     False
     """
 
-    try:
-        uuid_obj = UUID(uuid_to_test, version=version)
-    except ValueError:
+    # a single regex match, instead of parsing and formatting it again
+    match = _UUID_RE.fullmatch(uuid_to_test) if isinstance(uuid_to_test, str) else None
+    if match is None:
         return False
-    return str(uuid_obj) == uuid_to_test
+    return version is None or match.group(1) == str(version)
 
 
 def get_current_commit_hash(from_deploy=False):
@@ -453,51 +441,49 @@ def get_current_commit_hash(from_deploy=False):
     return hash_id
 
 
-def create_log(file_name: str, content: str, custom_dir=None):
+def create_log(file_name: str, content: str, custom_dir=None, wait=False):
     log_dir = settings.LOG_DIR
 
     # fir custom dir passed add to destination directory
     if custom_dir is not None:
         log_dir += custom_dir
 
-    try:
-        # create the destination if not exists
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-    except Exception as e:
-        if settings.DEBUG:
-            print("****************************************")
-            print("Atenção para esse erro:")
-            print(str(e))
-            print("****************************************")
-
     # fix: .log.log in file name
     if file_name[-4:] == ".log":
         file_name = file_name[:-4]
 
     file_name = "{}/{}.log".format(log_dir, file_name)
 
-    try:
-        f = open(file_name, 'w', encoding='utf8')
-        f.write(content)
-        f.close()
-    except Exception as e:
-        if settings.DEBUG:
-            print("****************************************")
-            print("Atenção para esse erro:")
-            print(str(e))
-            print("****************************************")
+    # the content is appended to the file by the background writer of the
+    # log sink (the destination directory is created there), wait=True
+    # blocks until it is written (to read the file back)
+    if content and content[-1] != "\n":
+        content += "\n"
+    get_log_sink().write(file_name, content, wait=wait)
 
     return file_name
 
 
 def model_to_dict(instance, include=None, exclude=None):
-    fields = instance._meta.concrete_fields
-    if include is not None:
-        return {f.attname: getattr(instance, f.attname) for f in fields if f.name in include}
-    if exclude is not None:
-        return {f.attname: getattr(instance, f.attname) for f in fields if f.name not in exclude}
-    return {f.attname: getattr(instance, f.attname) for f in fields}
+    # see get_model_serializer to serialize querysets in bulk
+    return get_model_serializer(instance.__class__, include, exclude)(instance)
+
+
+def get_client_ip(request) -> str:
+    """
+    The ip of the client behind the TRUSTED_PROXY_COUNT proxies. Only the
+    addresses appended by the trusted proxies are used, the client can
+    prepend anything to X-Forwarded-For.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if proxies <= 0:
+        return request.META.get('REMOTE_ADDR', '')
+
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if len(forwarded) < proxies:
+        # not behind the proxies (a direct request)
+        return request.META.get('REMOTE_ADDR', '')
+    return forwarded[-proxies]
 
 
 def html_response(request, template_name, status_code, context = {}):